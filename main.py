@@ -0,0 +1,82 @@
+"""
+统一的命令行入口：python main.py <子命令> [参数...]
+子命令对应的模块在选中后才导入，所以 matplotlib / seaborn / gurobipy / pulp
+只会在真正需要它们的子命令中加载。
+"""
+import argparse
+import importlib
+import subprocess
+import sys
+
+# 子命令 -> (模块名, 函数名, 说明)
+# 函数名为 main 的模块自己解析剩余参数，其余函数不接受参数
+COMMANDS = {
+    'q-learning': ('ql', 'main', "Q-Learning 机器人寻路 (R 矩阵)"),
+    'q-learning-gamma': ('ql2', 'main', "比较不同 Gamma 下的 Q-Table 热力图"),
+    'q-robot': ('qlrobot', 'run_exercises', "Epsilon-Greedy 与 Q 值更新练习"),
+    'policy-server': ('policy_server', 'main', "异步批量策略服务 (不带参数时运行本地压测)"),
+    'maximin': ('work1', 'maximin_analysis', "Max-Min 悲观准则决策"),
+    'decision-tree': ('work2', 'decision_tree_analysis', "决策树期望值分析"),
+    'decision-tree-figure': ('work2figure', 'draw_decision_tree', "绘制决策树"),
+    'bayes': ('work3', 'bayes_decision_analysis', "贝叶斯决策"),
+    'portfolio': ('work4', 'main', "项目组合的鲁棒性分析 (Gurobi)"),
+    'goal-programming': ('work6', 'main', "生产计划的目标规划 (PuLP)"),
+    'pi': ('work7', 'main', "蒙特卡洛仿真估计 PI"),
+    'monty-hall': ('work7-2', 'main', "三门问题仿真"),
+}
+
+
+def run_command(name, argv=()):
+    module_name, func_name, _ = COMMANDS[name]
+    func = getattr(importlib.import_module(module_name), func_name)
+    if func_name == 'main':
+        return func(list(argv))
+    if argv:
+        raise SystemExit(f"子命令 {name} 不接受参数: {' '.join(argv)}")
+    return func()
+
+
+def measure_startup(names=None, repeat=3):
+    """
+    在全新的解释器中导入每个子命令的模块，测量冷启动耗时 (取多次中的最小值)
+    :return: {子命令: 秒}
+    """
+    code = ("import time, importlib; t = time.perf_counter(); "
+            "importlib.import_module({!r}); print(time.perf_counter() - t)")
+    timings = {}
+    for name in names or COMMANDS:
+        module_name = COMMANDS[name][0]
+        runs = []
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, "-c", code.format(module_name)],
+                                 capture_output=True, text=True)
+            if out.returncode != 0:
+                runs = None
+                break
+            runs.append(float(out.stdout.strip().splitlines()[-1]))
+        timings[name] = min(runs) if runs else None
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="运筹学与强化学习作业的统一入口")
+    parser.add_argument("command", choices=list(COMMANDS) + ['startup'],
+                        help="要运行的子命令；startup 测量各子命令的冷启动时间")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="传给子命令的参数")
+    parser.epilog = "子命令:\n" + "\n".join(f"  {k:<22}{v[2]}" for k, v in COMMANDS.items())
+    parser.formatter_class = argparse.RawDescriptionHelpFormatter
+    args = parser.parse_args(argv)
+
+    if args.command == 'startup':
+        unknown = [name for name in args.args if name not in COMMANDS]
+        if unknown:
+            parser.error(f"未知的子命令: {', '.join(unknown)}")
+        for name, seconds in measure_startup(args.args or None).items():
+            shown = "导入失败 (缺少依赖?)" if seconds is None else f"{seconds * 1000:8.1f} ms"
+            print(f"{name:<22}{shown}")
+        return
+    run_command(args.command, args.args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+长曲线的绘图辅助函数
+训练/仿真曲线可能有上千万个点，直接交给 matplotlib 会非常慢，生成的图片也看不清。
+这里先把曲线降采样到固定的点数 (保留形状)，再绘制，绘图时间与曲线长度基本无关。
+"""
+import numpy as np
+
+MAX_POINTS = 2000  # 每条曲线最多绘制的点数
+
+
+def pyplot(show=False):
+    """
+    导入 pyplot；不需要弹出窗口时切换到 Agg 后端，没有显示环境也能保存图片
+    matplotlib 在这里才被导入，不画图的调用方不会付出导入开销
+    """
+    import matplotlib
+    if not show:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def moving_average(y, window):
+    """
+    用前缀和计算移动平均，复杂度 O(N)，与窗口大小无关
+    :return: 长度为 len(y) - window + 1 的数组 (与 np.convolve(mode='valid') 相同)
+    """
+    y = np.asarray(y, dtype=float)
+    if len(y) < window:
+        return np.empty(0)
+    cumsum = np.cumsum(np.concatenate([[0.0], y]))
+    return (cumsum[window:] - cumsum[:-window]) / window
+
+
+def minmax_downsample(x, y, n_buckets):
+    """
+    把曲线等分成 n_buckets 段，每段保留最小值和最大值两个点 (按原顺序)
+    尖峰不会被平均掉，适合噪声很大的原始曲线
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= 2 * n_buckets:
+        return x, y
+    size = -(-n // n_buckets)  # 向上取整
+    n_full = n // size * size
+    blocks = y[:n_full].reshape(-1, size)
+    offsets = np.arange(len(blocks)) * size
+    lo = offsets + blocks.argmin(axis=1)
+    hi = offsets + blocks.argmax(axis=1)
+    if n_full < n:
+        # 最后一段不满 size 个点，单独处理
+        lo = np.append(lo, n_full + y[n_full:].argmin())
+        hi = np.append(hi, n_full + y[n_full:].argmax())
+    idx = np.unique(np.concatenate([lo, hi]))  # 排序并去掉重复 (整段为常数时 lo == hi)
+    return x[idx], y[idx]
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets 降采样：每个桶里选出与前后两点构成三角形面积最大的点，
+    在点数很少的情况下也能保留曲线的视觉形状，适合平滑曲线 (如移动平均)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return x, y
+    # 首尾两点固定保留，中间的点分成 n_out - 2 个桶
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    idx = np.empty(n_out, dtype=int)
+    idx[0] = 0
+    idx[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # 下一个桶的平均点 (最后一个桶用末尾点)
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(area.argmax())
+        idx[i + 1] = a
+    return x[idx], y[idx]
+
+
+def downsample(x, y, max_points=MAX_POINTS, method='minmax'):
+    """
+    :param method: 'minmax' 保留每段的极值，'lttb' 保留视觉形状
+    """
+    if len(y) <= max_points:
+        return np.asarray(x), np.asarray(y)
+    if method == 'lttb':
+        return lttb(x, y, max_points)
+    if method == 'minmax':
+        return minmax_downsample(x, y, max_points // 2)
+    raise ValueError(f"未知的降采样方式: {method}")
+
+
+def plot_series(ax, y, x=None, max_points=MAX_POINTS, method='minmax', **kwargs):
+    """降采样后再绘制一条曲线，kwargs 原样传给 ax.plot"""
+    x = np.arange(len(y)) if x is None else x
+    x, y = downsample(x, y, max_points, method)
+    return ax.plot(x, y, **kwargs)
@@ -0,0 +1,426 @@
+"""
+基于 qlrobot.choose_action 的异步批量策略服务
+协议：TCP 上每行一个 JSON
+  请求 {"id": 1, "state": "s1", "epsilon": 0.1}   -> {"id": 1, "action": "l"}
+  请求 {"id": 2, "cmd": "stats"}                  -> {"id": 2, "stats": {...}}
+  请求 {"id": 3, "cmd": "reload"}                 -> {"id": 3, "ok": true, "states": 4}
+  出错时返回 {"id": ..., "error": "..."}
+reload 默认重新读取启动时的检查点；带 path 时只允许读取 --reload-dir 指定目录中的文件。
+并发到达的状态查询会被合并成一个小批次，用一次向量化的 argmax / epsilon 计算完成。
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+ACTIONS = ['u', 'r', 'd', 'l']
+
+
+def q_table_to_array(q_table, actions=ACTIONS):
+    """
+    把 qlrobot 使用的字典 Q 表 {state: {action: q}} 转成 (状态索引, Q 矩阵)
+    最后一行对应表中没有的状态，所有动作的 Q 值为 0 (与 choose_action 的默认值一致)；
+    表中某状态缺少的动作记为 -inf，因为 choose_action 只会在已有的动作中取最大值。
+    """
+    index = {state: i for i, state in enumerate(q_table)}
+    q_values = np.full((len(index) + 1, len(actions)), -np.inf)
+    for state, row in q_table.items():
+        for action, value in row.items():
+            q_values[index[state], actions.index(action)] = value
+    q_values[-1] = 0.0
+    return index, q_values
+
+
+def choose_actions_batch(rows, q_values, epsilons, rng):
+    """
+    choose_action 的批量版本：一次性为多个状态做 Epsilon-Greedy 选择
+    :param rows: 各状态在 q_values 中的行号
+    :param epsilons: 每个请求的探索概率
+    :return: 动作编号数组 (有多个最大值时取第一个，与 max(dict) 的行为一致)
+    """
+    greedy = q_values[rows].argmax(axis=1)
+    explore = rng.random(len(rows)) < epsilons
+    random_actions = rng.integers(0, q_values.shape[1], len(rows))
+    return np.where(explore, random_actions, greedy)
+
+
+def load_checkpoint(path):
+    """读取 JSON 格式的 Q 表检查点，格式与 qlrobot 中的 q_table 相同"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def parse_query(request):
+    """
+    检查一次状态查询，返回 (state, epsilon)；不合法时抛出 ValueError
+    state 必须能作为 Q 表的键 (字符串或数字)，epsilon 必须在 [0, 1] 之间
+    """
+    state = request['state']
+    if isinstance(state, bool) or not isinstance(state, (str, int, float)):
+        raise ValueError(f"state 必须是字符串或数字: {state!r}")
+    try:
+        epsilon = float(request.get('epsilon', 0.0))
+    except (TypeError, ValueError):
+        raise ValueError(f"epsilon 必须是数字: {request.get('epsilon')!r}") from None
+    if not 0.0 <= epsilon <= 1.0:
+        raise ValueError(f"epsilon 必须在 [0, 1] 之间: {epsilon}")
+    return state, epsilon
+
+
+class PolicyServer:
+    """
+    持有一份 Q 表，并把并发的查询合并成小批次处理
+    :param max_batch: 每批最多处理的请求数
+    :param max_delay: 第一个请求到达后最多再等待多久凑批 (秒)
+    :param max_queue: 等待凑批的查询数上限，队列满时新的查询等待
+    :param max_pending: 每个连接上同时处理中的请求数上限，达到后暂停读取该连接 (背压)
+    :param checkpoint: 启动时的检查点路径，reload 命令不带 path 时重新读取它
+    :param reload_dir: reload 命令允许读取的目录；None 表示只能重新读取 checkpoint
+    """
+
+    def __init__(self, q_table, actions=ACTIONS, max_batch=256, max_delay=0.001, seed=None,
+                 latency_window=10000, max_queue=16384, max_pending=1024, checkpoint=None,
+                 reload_dir=None):
+        self.actions = list(actions)
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.rng = np.random.default_rng(seed)
+        self.table = q_table_to_array(q_table, self.actions)
+        self.version = 1
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.max_pending = max_pending
+        self.latencies = deque(maxlen=latency_window)  # 最近若干请求的延迟 (秒)
+        self.served = 0
+        self.batches = 0
+        self.started = time.perf_counter()
+        self._server = None
+        self._batcher = None
+        self._connections = {}  # 连接处理任务 -> writer
+        self._watcher = None
+        self.checkpoint = checkpoint
+        self.reload_dir = None if reload_dir is None else os.path.realpath(reload_dir)
+
+    # --- Q 表热更新 ---
+    async def reload(self, path):
+        """在后台线程中读取新的检查点，读完后整体替换；正在处理的批次仍使用旧表"""
+        q_table = await asyncio.to_thread(load_checkpoint, path)
+        table = q_table_to_array(q_table, self.actions)
+        self.table = table  # 单次赋值，批处理循环每批开始时只读取一次
+        self.version += 1
+        return len(table[0])
+
+    async def watch(self, path, interval=1.0):
+        """轮询检查点文件，修改时间变化时自动热更新"""
+        last = os.path.getmtime(path)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                mtime = os.path.getmtime(path)
+                if mtime != last:
+                    last = mtime
+                    n = await self.reload(path)
+                    print(f"已热更新 Q 表: {path} ({n} 个状态, 版本 {self.version})")
+            except (OSError, ValueError) as e:
+                print(f"热更新失败，继续使用旧表: {e}")
+
+    def start_watching(self, path, interval=1.0):
+        """在后台运行 watch；保存任务引用，避免事件循环只持有弱引用时任务被回收"""
+        self._watcher = asyncio.create_task(self.watch(path, interval))
+
+    def _reload_path(self, path=None):
+        """客户端请求的检查点路径：只允许启动时的检查点或 reload_dir 中的文件"""
+        if path is None:
+            if self.checkpoint is None:
+                raise ValueError("服务没有配置检查点，无法 reload")
+            return self.checkpoint
+        if not isinstance(path, str):
+            raise ValueError(f"path 必须是字符串: {path!r}")
+        if self.reload_dir is None:
+            raise ValueError("服务没有配置 --reload-dir，reload 不能指定 path")
+        real = os.path.realpath(os.path.join(self.reload_dir, path))
+        if os.path.commonpath([real, self.reload_dir]) != self.reload_dir:
+            raise ValueError(f"只能读取 {self.reload_dir} 中的检查点: {path}")
+        return real
+
+    # --- 批量决策 ---
+    async def choose_action(self, state, epsilon=0.0):
+        """提交一次查询，等待所在批次完成后返回动作"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((state, epsilon, time.perf_counter(), future))
+        return await future
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                # 队列里已有的请求直接取走，否则最多等到 deadline
+                if self.queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self.queue.get_nowait())
+            try:
+                self._resolve(batch)
+            except Exception as e:
+                # 只让这一批的请求失败，批处理循环继续运行
+                for _, _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _resolve(self, batch):
+        index, q_values = self.table
+        default_row = len(q_values) - 1
+        rows = np.array([index.get(state, default_row) for state, _, _, _ in batch])
+        epsilons = np.array([epsilon for _, epsilon, _, _ in batch], dtype=float)
+        chosen = choose_actions_batch(rows, q_values, epsilons, self.rng)
+        now = time.perf_counter()
+        for (_, _, arrived, future), a in zip(batch, chosen):
+            if not future.done():
+                future.set_result(self.actions[a])
+            self.latencies.append(now - arrived)
+        self.served += len(batch)
+        self.batches += 1
+
+    def stats(self):
+        """p50 / p99 延迟 (毫秒)、QPS 与平均批大小"""
+        elapsed = time.perf_counter() - self.started
+        latencies = np.array(self.latencies) * 1000
+        return {
+            'served': self.served,
+            'batches': self.batches,
+            'mean_batch': self.served / self.batches if self.batches else 0.0,
+            'qps': self.served / elapsed if elapsed > 0 else 0.0,
+            'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None,
+            'version': self.version,
+        }
+
+    # --- 网络部分 ---
+    async def _handle(self, request):
+        cmd = request.get('cmd')
+        if cmd == 'stats':
+            return {'stats': self.stats()}
+        if cmd == 'reload':
+            try:
+                return {'ok': True, 'states': await self.reload(self._reload_path(request.get('path')))}
+            except (OSError, ValueError) as e:
+                return {'ok': False, 'error': str(e)}
+        if 'state' not in request:
+            return {'error': "缺少 state 字段"}
+        return {'action': await self.choose_action(*parse_query(request))}
+
+    async def _respond(self, writer, request):
+        """处理一个请求并写回响应；出错时也一定写回带 id 的错误响应，客户端不会一直等待"""
+        request_id = request.get('id') if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict):
+                raise ValueError("请求必须是 JSON 对象")
+            response = await self._handle(request)
+        except Exception as e:
+            response = {'error': str(e) or type(e).__name__}
+        response['id'] = request_id
+        if writer.is_closing():
+            return  # 连接已关闭 (客户端断开或服务关闭)，响应无处可写
+        writer.write((json.dumps(response) + "\n").encode())
+        try:
+            # 客户端读得慢时在这里等待，发送缓冲区不会无限增长
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _serve_client(self, reader, writer):
+        tasks = set()
+        pending = asyncio.Semaphore(self.max_pending)
+        self._connections[asyncio.current_task()] = writer
+        try:
+            # 同一连接上的请求并发处理，响应通过 id 与请求对应
+            while (line := await reader.readline()) and not writer.is_closing():
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    # 无法解析时取不到请求的 id
+                    writer.write(b'{"error": "invalid json", "id": null}\n')
+                    await writer.drain()
+                    continue
+                # 处理中的请求达到上限时不再读取，压力传回客户端的发送端
+                await pending.acquire()
+                task = asyncio.create_task(self._respond(writer, request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda _: pending.release())
+            if tasks:
+                await asyncio.gather(*tasks)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.pop(asyncio.current_task(), None)
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self._batcher = asyncio.create_task(self._batch_loop())
+        self._server = await asyncio.start_server(self._serve_client, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            # 关闭仍然打开的连接，并等它们的处理任务正常结束
+            connections = list(self._connections.items())
+            for _, writer in connections:
+                writer.close()
+            await asyncio.gather(*(task for task, _ in connections), return_exceptions=True)
+            await self._server.wait_closed()
+        for task in (self._batcher, self._watcher):
+            if task is not None:
+                task.cancel()
+
+
+class PolicyClient:
+    """本地测试用的客户端，一个连接上可以并发发送多个请求"""
+
+    def __init__(self):
+        self._reader = None
+        self._writer = None
+        self._pending = {}
+        self._next_id = 0
+        self._listener = None
+
+    async def connect(self, host="127.0.0.1", port=8765):
+        self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        try:
+            while line := await self._reader.readline():
+                response = json.loads(line)
+                future = self._pending.pop(response.get('id'), None)
+                if future is not None:
+                    future.set_result(response)
+        finally:
+            # 连接断开后，尚未收到响应的请求全部失败，不再一直等待
+            pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("与策略服务的连接已断开"))
+
+    async def request(self, **payload):
+        if self._listener is None or self._listener.done():
+            raise ConnectionError("与策略服务的连接已断开")
+        self._next_id += 1
+        payload['id'] = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self._next_id] = future
+        self._writer.write((json.dumps(payload) + "\n").encode())
+        return await future
+
+    async def choose_action(self, state, epsilon=0.0):
+        return (await self.request(state=state, epsilon=epsilon))['action']
+
+    async def stats(self):
+        return (await self.request(cmd='stats'))['stats']
+
+    async def reload(self, path=None):
+        if path is None:
+            return await self.request(cmd='reload')
+        return await self.request(cmd='reload', path=path)
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        if self._listener is not None:
+            self._listener.cancel()
+
+
+async def demo(n_requests=20000, concurrency=500, epsilon=0.1):
+    """启动服务，用本地客户端并发压测，中途热更新一次 Q 表，最后输出统计"""
+    import tempfile
+
+    # qlrobot 练习中的 Q 表
+    q_table = {
+        's1': {'u': 10, 'r': -0.29, 'd': -0.29, 'l': 0},
+        's2': {'u': -24, 'r': -13, 'd': -0.29, 'l': 40},
+        's3': {'u': -20, 'r': -20, 'd': 10, 'l': -20},
+        's4': {'u': 0, 'r': 0, 'd': 0, 'l': 0},
+    }
+    tmp_dir = tempfile.TemporaryDirectory()
+    server = PolicyServer(q_table, seed=0, reload_dir=tmp_dir.name)
+    port = await server.start(port=0)
+    client = PolicyClient()
+    await client.connect(port=port)
+    print(f"服务已启动: 127.0.0.1:{port}")
+    print(f"贪心策略: s1 -> {await client.choose_action('s1')}, s2 -> {await client.choose_action('s2')}")
+
+    # 更新后的检查点：s1 的最优动作从 u 变为 r
+    q_table['s1']['r'] = 50
+    with open(os.path.join(tmp_dir.name, "q.json"), "w", encoding="utf-8") as f:
+        json.dump(q_table, f)
+    states = list(q_table) + ['unknown']
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            return await client.choose_action(states[i % len(states)], epsilon)
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(one(i)) for i in range(n_requests)]
+    # 压测进行中热更新，所有请求都应正常返回
+    await asyncio.sleep(0)
+    print(f"热更新: {await client.reload('q.json')}")
+    results = await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    tmp_dir.cleanup()
+    print(f"完成 {len(results)} 个请求, 用时 {elapsed:.2f}s ({len(results) / elapsed:,.0f} QPS)")
+    print(f"更新后贪心策略: s1 -> {await client.choose_action('s1')}")
+    for key, value in (await client.stats()).items():
+        print(f"  {key}: {value:.3f}" if isinstance(value, float) else f"  {key}: {value}")
+    await client.close()
+    await server.close()
+
+
+async def serve(checkpoint, host, port, watch, max_batch, max_delay, reload_dir=None):
+    server = PolicyServer(load_checkpoint(checkpoint), max_batch=max_batch, max_delay=max_delay,
+                          checkpoint=checkpoint, reload_dir=reload_dir)
+    port = await server.start(host, port)
+    print(f"策略服务已启动: {host}:{port} (检查点 {checkpoint})")
+    if watch:
+        server.start_watching(checkpoint)
+    await asyncio.Event().wait()  # 一直运行，直到被中断
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="异步批量 Epsilon-Greedy 策略服务")
+    parser.add_argument("checkpoint", nargs="?", default=None, help="JSON 格式的 Q 表检查点")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--watch", action="store_true", help="检查点文件变化时自动热更新")
+    parser.add_argument("--reload-dir", default=None,
+                        help="reload 命令可以指定该目录中的检查点 (默认只能重新读取 checkpoint)")
+    parser.add_argument("--max-batch", type=int, default=256, help="每批最多请求数")
+    parser.add_argument("--max-delay", type=float, default=0.001, help="凑批最长等待时间 (秒)")
+    parser.add_argument("--demo", action="store_true", help="启动服务并用本地客户端压测")
+    args = parser.parse_args(argv)
+
+    if args.demo or args.checkpoint is None:
+        asyncio.run(demo())
+    else:
+        try:
+            asyncio.run(serve(args.checkpoint, args.host, args.port, args.watch,
+                              args.max_batch, args.max_delay, args.reload_dir))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
-import numpy as np
+import argparse
+import heapq
 import random
-import matplotlib.pyplot as plt
+
+import numpy as np
+
+from plotting import MAX_POINTS, moving_average, plot_series, pyplot
+
 # --- 1. 定义环境和参数 (Setup) ---
 r = np.array([
     [-1, -1, -1, 0, -1, -1, -1],  # 状态 0 (State 0) -> 3
@@ -11,126 +16,336 @@ r = np.array([
     [-1, -1, 0, -1, 0, -1, 100],  # 状态 5 (State 5) -> 2, 4, 6
     [-1, -1, -1, -1, 0, 0, 100]  # 状态 6 (State 6) -> 4, 5, 6 (Terminal)
 ])
-q = np.zeros((7, 7))
 gamma = 0.8
 episodes = 1000
-steps_per_episode = [] # 记录每轮走了多少步
+
+
+def make_grid_r(width, height, goal_reward=100):
+    """
+    生成一个 width x height 网格迷宫的 R 矩阵 (状态编号 y * width + x)，
+    可以在上下左右相邻格子间移动，最后一个格子是终点，用来测试直径很长的大图
+    """
+    n_states = width * height
+    goal = n_states - 1
+    grid_r = np.full((n_states, n_states), -1)
+    for s in range(n_states):
+        y, x = divmod(s, width)
+        for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            if 0 <= y + dy < height and 0 <= x + dx < width:
+                grid_r[s, (y + dy) * width + x + dx] = 0
+    grid_r[grid_r[:, goal] == 0, goal] = goal_reward
+    grid_r[goal, goal] = goal_reward
+    return grid_r
+
+
 # --- 2. 训练阶段 (Training) ---
-print("--- 🤖 开始训练 ---")
-for i in range(episodes):
-    # 随机选择一个起始状态 (不能是终点 6)
-    state = random.randint(0, 5)
-    steps_this_episode = 0  # 初始化当前轮的步数 ---
-    while state != 6:
-        # --- 探索 (Exploration) ---
-        # 1. 找出当前状态所有可能的行动 (r[state, action] >= 0)
-        possible_actions = []
-        for action in range(7):
-            if r[state, action] >= 0:
-                possible_actions.append(action)
-        # 2. 随机选择一个可能的行动 (即下一个状态)
-        # 这是为了探索环境
-        next_state = random.choice(possible_actions)
-        q[state, next_state] = r[state, next_state] + gamma * q[next_state].max()
-        # 3. 转移到下一个状态
-        state = next_state
-        steps_this_episode += 1  # --- 新增：步数加 1 ---
-        # 安全退出：防止在早期训练中无限循环
-        if steps_this_episode > 100:
+def train(r=r, gamma=gamma, episodes=episodes, seed=None, jit=False):
+    """
+    随机探索训练 Q-Table
+    :param jit: 安装了 numba 时用编译内核跑完全部轮次，否则退回下面的 Python 循环
+    :return: (q, steps_per_episode) steps_per_episode 记录每轮走了多少步
+    """
+    if jit:
+        import ql_kernels
+        if ql_kernels.HAVE_NUMBA:
+            q = np.zeros(r.shape)
+            print("--- 🤖 开始训练 (Numba) ---")
+            steps_per_episode = ql_kernels.r_matrix_episodes(r, q, gamma, episodes, 100, seed)
+            print("--- ✅ 训练完成 ---")
+            return q, steps_per_episode.tolist()
+        print("未安装 numba，使用 Python 实现")
+    rng = random.Random(seed)
+    n_states = len(r)
+    goal = n_states - 1
+    q = np.zeros(r.shape)
+    steps_per_episode = []
+    print("--- 🤖 开始训练 ---")
+    for i in range(episodes):
+        # 随机选择一个起始状态 (不能是终点)
+        state = rng.randint(0, goal - 1)
+        steps_this_episode = 0  # 初始化当前轮的步数 ---
+        while state != goal:
+            # --- 探索 (Exploration) ---
+            # 1. 找出当前状态所有可能的行动 (r[state, action] >= 0)
+            possible_actions = []
+            for action in range(n_states):
+                if r[state, action] >= 0:
+                    possible_actions.append(action)
+            # 2. 随机选择一个可能的行动 (即下一个状态)
+            # 这是为了探索环境
+            next_state = rng.choice(possible_actions)
+            q[state, next_state] = r[state, next_state] + gamma * q[next_state].max()
+            # 3. 转移到下一个状态
+            state = next_state
+            steps_this_episode += 1  # --- 新增：步数加 1 ---
+            # 安全退出：防止在早期训练中无限循环
+            if steps_this_episode > 100:
+                break
+        steps_per_episode.append(steps_this_episode)  # --- 新增：记录本轮的总步数 ---
+    print("--- ✅ 训练完成 ---")
+    return q, steps_per_episode
+
+
+def build_predecessors(r=r):
+    """由 R 矩阵建立前驱索引：predecessors[s] 是所有能一步走到 s 的状态"""
+    return [np.flatnonzero(r[:, s] >= 0) for s in range(len(r))]
+
+
+def plan_prioritized_sweeping(r=r, gamma=gamma, theta=1e-9, max_updates=None):
+    """
+    优先扫描 (Prioritized Sweeping)：R 矩阵已经完整描述了转移模型，
+    所以不必随机走动，而是用优先队列按 Bellman 误差从大到小更新 Q 值，
+    某个状态的价值变化后，再把它的前驱放进队列，终点的 +100 会沿最短路径迅速传回去。
+    收敛到与 train() 相同的 Q-Table (终点行保持为 0)。
+    :param theta: Bellman 误差小于它时不再入队
+    :param max_updates: 最多更新次数 (None 表示直到收敛)
+    :return: (q, n_updates)
+    """
+    n_states = len(r)
+    goal = n_states - 1
+    q = np.zeros(r.shape)
+    predecessors = build_predecessors(r)
+    # 队列中的元素为 (-误差, s, a)；heapq 是最小堆，所以误差取负
+    queue = []
+    priority = {}
+    for s, a in zip(*np.nonzero(r >= 0)):
+        if s != goal and r[s, a] > theta:
+            priority[s, a] = r[s, a]
+            heapq.heappush(queue, (-r[s, a], s, a))
+    n_updates = 0
+    while queue and (max_updates is None or n_updates < max_updates):
+        neg_error, s, a = heapq.heappop(queue)
+        if priority.get((s, a)) != -neg_error:
+            continue  # 已被更大的误差覆盖的旧条目
+        del priority[s, a]
+        old_value = q[s].max()
+        q[s, a] = r[s, a] + gamma * q[a].max()
+        n_updates += 1
+        value = q[s].max()
+        if value == old_value:
+            continue
+        # s 的价值变了，检查所有能走到 s 的前驱 (p -> s)
+        for p in predecessors[s]:
+            if p == goal:
+                continue
+            error = abs(r[p, s] + gamma * value - q[p, s])
+            if error > theta and error > priority.get((p, s), 0):
+                priority[p, s] = error
+                heapq.heappush(queue, (-error, p, s))
+    return q, n_updates
+
+
+def train_goal_conditioned(r=r, gamma=gamma, goals=None, goal_reward=100, max_sweeps=None,
+                           tol=1e-9, dtype=np.float64):
+    """
+    以目标为条件的 Q-Learning：一次性学习所有终点的 Q 值，
+    结果存放在形状为 (终点数, 状态数, 动作数) 的表中，换终点时不必重建 R 矩阵、重新训练。
+    R 矩阵只用来确定哪些移动是允许的 (r >= 0)；到达终点 g 的那一步奖励为 goal_reward，
+    其余为 0，终点所在的行保持为 0 (与 train() 中终点不再更新一致)。
+    每一轮对所有终点、所有允许的移动同时做一次 Bellman 更新 (向量化扫描)。
+    扫描只在允许的移动 (边) 上进行，两个 (终点数, 边数) 的缓冲区交替计算，
+    奖励只加在走进各终点的边上；收敛后才展开成稠密的 Q 表。
+    :param goals: 要学习的终点列表，默认为全部状态
+    :param max_sweeps: 最多扫描轮数，默认为状态数 + 1 (足以覆盖图的直径)
+    :param dtype: Q 表的数据类型；终点很多时可用 np.float32 减半内存
+    :return: (goal_q, goals, n_sweeps)
+    """
+    n_states = len(r)
+    goals = np.arange(n_states) if goals is None else np.asarray(goals)
+    n_goals = len(goals)
+    # 所有允许的移动 src -> dst，按 src 排好序，便于按状态分段取最大值
+    src, dst = np.nonzero(r >= 0)
+    has_moves, starts = np.unique(src, return_index=True)
+    # 奖励只出现在 [k, 走进终点 k 的边] 上；终点 k 出发的边保持为 0 (吸收状态)
+    reward_k, reward_e = np.nonzero(dst[None, :] == goals[:, None])
+    absorbing = src[None, :] == goals[:, None]
+    q_edges = np.zeros((n_goals, len(src)), dtype=dtype)
+    new_edges = np.empty_like(q_edges)
+    value = np.zeros((n_goals, n_states), dtype=dtype)  # 没有出边的状态价值为 0
+    max_sweeps = n_states + 1 if max_sweeps is None else max_sweeps
+    n_sweeps = 0
+    for n_sweeps in range(1, max_sweeps + 1):
+        if len(src):
+            value[:, has_moves] = np.maximum.reduceat(q_edges, starts, axis=1)  # (终点, 状态)
+        # Q_k(s, a) = 奖励 + gamma * V_k(a)
+        np.take(value, dst, axis=1, out=new_edges)
+        new_edges *= gamma
+        new_edges[reward_k, reward_e] += goal_reward
+        np.copyto(new_edges, 0, where=absorbing)
+        # 收敛判断在旧缓冲区里原地计算，然后交换两个缓冲区
+        np.subtract(q_edges, new_edges, out=q_edges)
+        np.abs(q_edges, out=q_edges)
+        converged = q_edges.max(initial=0) <= tol
+        q_edges, new_edges = new_edges, q_edges
+        if converged:
             break
-    steps_per_episode.append(steps_this_episode)  # --- 新增：记录本轮的总步数 ---
-print("--- ✅ 训练完成 ---")
-print("最终的 Q-Table (四舍五入到2位小数):")
-print(np.round(q, 2))
+    goal_q = np.zeros((n_goals, n_states, n_states), dtype=dtype)
+    goal_q[:, src, dst] = q_edges
+    return goal_q, goals, n_sweeps
+
+
+def route(goal_q, goals, start, goal, r=r):
+    """
+    用共享的目标条件 Q 表回答 start -> goal 的路线查询
+    :return: 路径列表；无法到达时返回 None
+    :raises ValueError: start 不是合法状态，或 goal 不在 goals 中
+    """
+    if not 0 <= start < len(r):
+        raise ValueError(f"起点 {start} 超出范围 (状态 0 ~ {len(r) - 1})")
+    matches = np.flatnonzero(np.asarray(goals) == goal)
+    if len(matches) == 0:
+        raise ValueError(f"终点 {goal} 不在已学习的终点中 ({', '.join(map(str, goals))})")
+    k = int(matches[0])
+    q = np.where(r >= 0, goal_q[k], -np.inf)  # 只在允许的移动中取最大值
+    state = start
+    path = [state]
+    for _ in range(len(r)):
+        if state == goal:
+            return path
+        if goal_q[k, state].max() <= 0:
+            return None  # 从这里到不了终点
+        state = int(q[state].argmax())
+        path.append(state)
+    return path if state == goal else None
+
+
 # --- 绘制训练结果图表 ---
-def plot_training_results(steps_list):
+def plot_training_results(steps_list, output="training_progress.png", show=False, max_points=MAX_POINTS):
+    """
+    :param max_points: 每条曲线最多绘制的点数，轮数很多时先降采样，绘图时间基本不变
+    """
+    plt = pyplot(show)
+
     print("--- 📊 正在生成训练结果图表 ---")
-    plt.figure(figsize=(12, 6))
-    # 绘制原始的每轮步数（会很杂乱）
-    plt.plot(steps_list, alpha=0.3, label='Steps per Episode')
+    fig, ax = plt.subplots(figsize=(12, 6))
+    # 绘制原始的每轮步数（会很杂乱）；按段保留最大/最小值，尖峰不会丢失
+    plot_series(ax, steps_list, max_points=max_points, method='minmax',
+                alpha=0.3, label='Steps per Episode')
     # 计算并绘制移动平均线（更能反映趋势）使用 50 轮的窗口计算移动平均值
     window_size = 50
     if len(steps_list) >= window_size:
-        # 使用 np.convolve 计算移动平均
-        moving_avg = np.convolve(steps_list, np.ones(window_size) / window_size, mode='valid')
+        # 用前缀和计算移动平均，O(N)
+        moving_avg = moving_average(steps_list, window_size)
         # 绘制移动平均线
-        plt.plot(range(window_size - 1, len(steps_list)), moving_avg, color='red',
-                 label=f'{window_size}-Episode Moving Average')
-    plt.title('Training Progress: Steps to Reach Goal')
-    plt.xlabel('Episode')
-    plt.ylabel('Number of Steps')
-    plt.legend()
-    plt.grid(True)
+        plot_series(ax, moving_avg, np.arange(window_size - 1, len(steps_list)),
+                    max_points=max_points, method='lttb', color='red',
+                    label=f'{window_size}-Episode Moving Average')
+    ax.set_title('Training Progress: Steps to Reach Goal')
+    ax.set_xlabel('Episode')
+    ax.set_ylabel('Number of Steps')
+    ax.legend()
+    ax.grid(True)
     # 保存图表
-    plt.savefig("training_progress.png")
-    print("图表已保存为 training_progress.png")
+    if output:
+        fig.savefig(output)
+        print(f"图表已保存为 {output}")
     # 显示图表
-    plt.show()
-plot_training_results(steps_per_episode)
+    if show:
+        plt.show()
+    plt.close(fig)
+
+
 # --- 3. 测试阶段 ---
-print("--- 🤖 开始测试 (从随机位置出发) ---")
-# 随机选择一个起始点
-state = random.randint(0, 5)
-print(f"机器人初始位置于: {state}")
-count = 0
-path = [state]  # 记录路径
-while state != 6:
-    # 对应图片中的 "if count > 20" 安全检查
-    count += 1
-    if count > 20:
-        print("测试失败：超过20步，可能陷入循环")
-        break
-    # --- 利用 (Exploitation) ---
-    # 1. 找到当前状态下 Q 值最大的那个值
-    q_max = q[state].max()
-    # 2. 找到所有等于最大 Q 值的行动 (可能不止一个)
-    q_max_actions = []
-    for action in range(7):
-        if q[state, action] == q_max:
-            q_max_actions.append(action)
-    # 3. 从所有最佳行动中随机选择一个
-    next_state = random.choice(q_max_actions)
-    print(f"机器人 goes to {next_state}.")
-    path.append(next_state)
-    state = next_state
-if state == 6:
-    print(f"🏆 成功! 机器人到达终点 6.")
-    print(f"路径: {' -> '.join(map(str, path))}")
-# --- 3. 测试阶段  ---
-print("--- 🤖 开始测试 (从指定位置 1 出发) ---")
-state = 1
-print(f"机器人初始位置于: {state}")
-count = 0
-path = [state]  # 记录路径
-while state != 6:
-    count += 1
-    if count > 20:
-        print("测试失败：超过20步，可能陷入循环")
-        break
-    # --- 利用 (Exploitation) ---
-    # 1. 找到当前状态下 Q 值最大的那个值
-    q_max = q[state].max()
-    # 2. 找到所有等于最大 Q 值的行动 (可能不止一个)
-    q_max_actions = []
-    for action in range(7):
-        # 确保动作是有效的 (Q > 0 或 R >= 0)
-        # 并且等于最大值
-        if q[state, action] == q_max and q[state, action] > 0:
-            q_max_actions.append(action)
-    # 如果没有找到 Q > 0 的行动（可能在训练不足时发生），则退回原始R矩阵找路
-    if not q_max_actions:
-        print(f" (在状态 {state} 遇到困难，根据R矩阵探索...)")
-        for action in range(7):
-            if r[state, action] >= 0:
+def run_test(q, start, r=r, max_steps=20, seed=None):
+    """
+    从 start 出发按 Q-Table 贪心行走
+    :return: 走过的路径 (列表)
+    """
+    rng = random.Random(seed)
+    goal = len(r) - 1
+    state = start
+    print(f"机器人初始位置于: {state}")
+    count = 0
+    path = [state]  # 记录路径
+    while state != goal:
+        # 对应图片中的 "if count > 20" 安全检查
+        count += 1
+        if count > max_steps:
+            print(f"测试失败：超过{max_steps}步，可能陷入循环")
+            break
+        # --- 利用 (Exploitation) ---
+        # 1. 找到当前状态下 Q 值最大的那个值
+        q_max = q[state].max()
+        # 2. 找到所有等于最大 Q 值的行动 (可能不止一个)
+        q_max_actions = []
+        for action in range(len(r)):
+            # 确保动作是有效的 (Q > 0 或 R >= 0)
+            # 并且等于最大值
+            if q[state, action] == q_max and q[state, action] > 0:
                 q_max_actions.append(action)
+        # 如果没有找到 Q > 0 的行动（可能在训练不足时发生），则退回原始R矩阵找路
         if not q_max_actions:
-            print("彻底卡住，无法移动。")
-            break
-    # 3. 从所有最佳行动中随机选择一个
-    next_state = random.choice(q_max_actions)
-    print(f"机器人 goes to {next_state}.")
-    path.append(next_state)
-    state = next_state
-if state == 6:
-    print(f"🏆 成功! 机器人到达终点 6.")
-    print(f"路径: {' -> '.join(map(str, path))}")
\ No newline at end of file
+            print(f" (在状态 {state} 遇到困难，根据R矩阵探索...)")
+            for action in range(len(r)):
+                if r[state, action] >= 0:
+                    q_max_actions.append(action)
+            if not q_max_actions:
+                print("彻底卡住，无法移动。")
+                break
+        # 3. 从所有最佳行动中随机选择一个
+        next_state = rng.choice(q_max_actions)
+        print(f"机器人 goes to {next_state}.")
+        path.append(next_state)
+        state = next_state
+    if state == goal:
+        print(f"🏆 成功! 机器人到达终点 {goal}.")
+        print(f"路径: {' -> '.join(map(str, path))}")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Q-Learning 机器人寻路 (R 矩阵)")
+    parser.add_argument("--episodes", type=int, default=episodes, help="训练轮数")
+    parser.add_argument("--gamma", type=float, default=gamma, help="衰减因子")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    parser.add_argument("--grid", type=int, nargs=2, metavar=("W", "H"), default=None,
+                        help="改用 W x H 的网格迷宫 (终点在右下角)")
+    parser.add_argument("--jit", action="store_true", help="安装了 numba 时使用编译内核训练")
+    parser.add_argument("--planning", action="store_true",
+                        help="用优先扫描 (基于模型的规划) 代替随机探索训练")
+    parser.add_argument("--all-goals", action="store_true",
+                        help="一次性学习所有终点的 Q 值，并回答 --route 查询")
+    parser.add_argument("--route", type=int, nargs=2, action="append", metavar=("START", "GOAL"),
+                        default=None, help="路线查询 (配合 --all-goals，可重复)")
+    parser.add_argument("-o", "--output", default="training_progress.png",
+                        help="训练曲线的保存路径 (传空字符串则不保存)")
+    parser.add_argument("--no-plot", action="store_true", help="不绘制训练曲线")
+    parser.add_argument("--show", action="store_true", help="弹出窗口显示训练曲线")
+    args = parser.parse_args(argv)
+    if args.route and not args.all_goals:
+        parser.error("--route 需要同时指定 --all-goals")
+
+    env = r if args.grid is None else make_grid_r(*args.grid)
+    if args.all_goals:
+        goal_q, goals, n_sweeps = train_goal_conditioned(env, args.gamma)
+        print(f"--- ✅ 已学习 {len(goals)} 个终点，共扫描 {n_sweeps} 轮，"
+              f"Q 表形状 {goal_q.shape} ({goal_q.nbytes / 2 ** 20:.1f} MB) ---")
+        for start, goal in args.route or [(1, len(env) - 1)]:
+            try:
+                path = route(goal_q, goals, start, goal, env)
+            except ValueError as e:
+                print(f"路线 {start} -> {goal}: {e}")
+                continue
+            shown = "无法到达" if path is None else ' -> '.join(map(str, path))
+            print(f"路线 {start} -> {goal}: {shown}")
+        return
+    if args.planning:
+        q, n_updates = plan_prioritized_sweeping(env, args.gamma)
+        print(f"--- ✅ 优先扫描完成，共更新 {n_updates} 次 ---")
+    else:
+        q, steps_per_episode = train(env, args.gamma, args.episodes, args.seed, args.jit)
+        print(f"共更新 {sum(steps_per_episode)} 次")
+    if len(env) <= 20:
+        print("最终的 Q-Table (四舍五入到2位小数):")
+        print(np.round(q, 2))
+    if not args.planning and not args.no_plot:
+        plot_training_results(steps_per_episode, args.output, args.show)
+    max_steps = max(20, len(env))
+    print("--- 🤖 开始测试 (从随机位置出发) ---")
+    run_test(q, random.Random(args.seed).randint(0, len(env) - 2), env, max_steps, seed=args.seed)
+    print("--- 🤖 开始测试 (从指定位置 1 出发) ---")
+    run_test(q, 1, env, max_steps, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
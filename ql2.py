@@ -1,9 +1,10 @@
+import argparse
 import numpy as np
 import random
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os  # 引入 os 库来创建文件夹
 
+from plotting import pyplot
+
 # 1. 定义环境 (R-Matrix)
 r = np.array([
     [-1, -1, -1, 0, -1, -1, -1],  # 0
@@ -16,7 +17,37 @@ r = np.array([
 ])
 
 
-def run_experiment(gamma, episodes=2001, update_freq=100):
+def save_heatmap(q, gamma, episode, save_dir):
+    """把当前的 Q-Table 画成热力图并保存，返回文件名"""
+    # 只有需要画图时才导入 matplotlib / seaborn
+    import seaborn as sns
+    plt = pyplot()
+
+    # 1. 创建一个新的图像窗口
+    fig, ax = plt.subplots(figsize=(8, 6))
+
+    # 2. 绘制热力图
+    # vmin=0, vmax=101: 固定颜色范围，确保所有图像的颜色刻度一致
+    sns.heatmap(q, ax=ax, annot=True, fmt=".1f", cmap="viridis",
+                linewidths=.5, cbar=True, vmin=0, vmax=101)
+
+    ax.set_title(f"Q-Table (Gamma = {gamma} | Episode: {episode})")
+    ax.set_xlabel("Action (Next State)")
+    ax.set_ylabel("Current State")
+
+    # 3. 定义保存路径
+    # 使用 zfill(4) 确保文件名按数字顺序排列 (例如 0100, 0200, ... 1000)
+    filename = f"{save_dir}/episode_{str(episode).zfill(4)}.png"
+
+    # 4. 保存图像
+    plt.savefig(filename)
+
+    # 5. 关闭图像，防止内存泄漏
+    plt.close(fig)
+    return filename
+
+
+def run_experiment(gamma, episodes=2001, update_freq=100, heatmaps=True, jit=False):
     """
     运行Q-Learning训练并按指定频率保存热力图。
 
@@ -24,18 +55,38 @@ def run_experiment(gamma, episodes=2001, update_freq=100):
     gamma (float): 衰减因子
     episodes (int): 总训练轮次
     update_freq (int): 每隔多少轮保存一次图像
+    heatmaps (bool): 是否保存热力图 (False 时不会导入 matplotlib / seaborn)
+    jit (bool): 安装了 numba 时，两次保存之间的所有轮次在编译内核中一次跑完
     """
 
     print(f"\n--- 🚀 开始实验: Gamma = {gamma} ---")
 
     # 为此次实验创建一个文件夹
     save_dir = f"gamma_{gamma}"
-    os.makedirs(save_dir, exist_ok=True)
-    print(f"图像将保存到: {save_dir}/")
+    if heatmaps:
+        os.makedirs(save_dir, exist_ok=True)
+        print(f"图像将保存到: {save_dir}/")
 
     # 每次实验都重新初始化 Q-Table
     q = np.zeros((7, 7))
 
+    if jit:
+        import ql_kernels
+        if ql_kernels.HAVE_NUMBA:
+            # 需要保存图像的轮次 (每 100 轮及最后一轮)
+            checkpoints = sorted(set(range(0, episodes, update_freq)) | {episodes - 1}) if heatmaps else [episodes - 1]
+            done = 0
+            for i in checkpoints:
+                ql_kernels.r_matrix_episodes(r, q, gamma, i + 1 - done, max_steps=None)
+                done = i + 1
+                if heatmaps:
+                    filename = save_heatmap(q, gamma, i, save_dir)
+                    if i % update_freq == 0:
+                        print(f"  ...已保存 {filename}")
+            print(f"--- ✅ 实验完成: Gamma = {gamma} ---")
+            return q
+        print("未安装 numba，使用 Python 实现")
+
     for i in range(episodes):
         state = random.randint(0, 5)
 
@@ -53,42 +104,31 @@ def run_experiment(gamma, episodes=2001, update_freq=100):
 
         # --- 核心修改：保存图像 ---
         # 每 100 轮或在最后一轮保存
-        if i % update_freq == 0 or i == episodes - 1:
-
-            # 1. 创建一个新的图像窗口
-            fig, ax = plt.subplots(figsize=(8, 6))
-
-            # 2. 绘制热力图
-            # vmin=0, vmax=101: 固定颜色范围，确保所有图像的颜色刻度一致
-            sns.heatmap(q, ax=ax, annot=True, fmt=".1f", cmap="viridis",
-                        linewidths=.5, cbar=True, vmin=0, vmax=101)
-
-            ax.set_title(f"Q-Table (Gamma = {gamma} | Episode: {i})")
-            ax.set_xlabel("Action (Next State)")
-            ax.set_ylabel("Current State")
+        if heatmaps and (i % update_freq == 0 or i == episodes - 1):
+            filename = save_heatmap(q, gamma, i, save_dir)
+            if i % update_freq == 0:
+                print(f"  ...已保存 {filename}")
 
-            # 3. 定义保存路径
-            # 使用 zfill(4) 确保文件名按数字顺序排列 (例如 0100, 0200, ... 1000)
-            filename = f"{save_dir}/episode_{str(i).zfill(4)}.png"
+    print(f"--- ✅ 实验完成: Gamma = {gamma} ---")
+    return q
 
-            # 4. 保存图像
-            plt.savefig(filename)
 
-            # 5. 关闭图像，防止内存泄漏
-            plt.close(fig)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="比较不同 Gamma 下的 Q-Table 收敛过程")
+    # 默认：实验1 高 Gamma (有远见)，实验2 低 Gamma (短视)
+    parser.add_argument("--gammas", type=float, nargs="+", default=[0.9, 0.2], help="要比较的衰减因子")
+    parser.add_argument("--episodes", type=int, default=2001, help="总训练轮次")
+    parser.add_argument("--update-freq", type=int, default=100, help="每隔多少轮保存一次热力图")
+    parser.add_argument("--no-heatmaps", action="store_true", help="只训练，不保存热力图")
+    parser.add_argument("--jit", action="store_true", help="安装了 numba 时使用编译内核训练")
+    args = parser.parse_args(argv)
 
-            if i % update_freq == 0:
-                print(f"  ...已保存 {filename}")
+    for g in args.gammas:
+        run_experiment(g, args.episodes, args.update_freq, heatmaps=not args.no_heatmaps, jit=args.jit)
 
-    print(f"--- ✅ 实验完成: Gamma = {gamma} ---")
+    print("\n所有实验均已完成。请检查生成的文件夹。")
 
 
 # --- 运行主程序 ---
 if __name__ == "__main__":
-    # 实验1: 高 Gamma (有远见)
-    run_experiment(gamma=0.9)
-
-    # 实验2: 低 Gamma (短视)
-    run_experiment(gamma=0.2)
-
-    print("\n所有实验均已完成。请检查生成的文件夹。")
\ No newline at end of file
+    main()
@@ -0,0 +1,182 @@
+"""
+Q-Learning 内层循环的可选编译内核
+每一轮都依赖上一轮刚更新过的 Q 表，无法整体向量化，所以把整轮 (乃至多轮) 训练
+放进一个用 Numba 编译的函数里执行，内核使用 Numba 自己的随机数发生器。
+没有安装 Numba 时 HAVE_NUMBA 为 False，调用方应退回原来的 Python 实现：
+  ql.train(jit=True) / ql2.run_experiment(jit=True) / run_tabular(backend='auto')
+"""
+import random
+
+import numpy as np
+
+try:
+    import numba
+    HAVE_NUMBA = True
+except ImportError:
+    numba = None
+    HAVE_NUMBA = False
+
+ACTIONS = ['u', 'r', 'd', 'l']
+
+
+def _njit(func):
+    """有 Numba 时编译，否则原样返回 (不会被调用，只是保证模块可以导入)"""
+    return numba.njit(cache=True)(func) if HAVE_NUMBA else func
+
+
+def resolve_seed(seed=None):
+    """内核的种子必须是整数；None 时随机生成一个"""
+    return int(np.random.SeedSequence(seed).generate_state(1)[0])
+
+
+# ==========================================
+# ql.py / ql2.py：R 矩阵上的随机探索训练
+# ==========================================
+
+@_njit
+def _seed(seed):
+    # 在编译代码中调用 np.random.seed 只影响 Numba 自己的随机数状态
+    np.random.seed(seed)
+
+
+@_njit
+def _r_matrix_episodes(r, q, gamma, episodes, max_steps):
+    n_states = r.shape[0]
+    goal = n_states - 1
+    steps = np.zeros(episodes, dtype=np.int64)
+    possible_actions = np.empty(n_states, dtype=np.int64)
+    for i in range(episodes):
+        # 随机选择一个起始状态 (不能是终点)
+        state = np.random.randint(0, goal)
+        count = 0
+        while state != goal:
+            # 找出当前状态所有可能的行动，随机选一个
+            k = 0
+            for action in range(n_states):
+                if r[state, action] >= 0:
+                    possible_actions[k] = action
+                    k += 1
+            if k == 0:
+                break
+            next_state = possible_actions[np.random.randint(0, k)]
+            q[state, next_state] = r[state, next_state] + gamma * q[next_state].max()
+            state = next_state
+            count += 1
+            # max_steps < 0 表示不限制步数 (ql2 的写法)
+            if 0 <= max_steps < count:
+                break
+        steps[i] = count
+    return steps
+
+
+def r_matrix_episodes(r, q, gamma, episodes, max_steps=100, seed=None):
+    """
+    在编译内核中连续训练若干轮，原地更新 q，需要 HAVE_NUMBA
+    :param max_steps: 每轮超过该步数就结束 (与 ql.train 相同)；None 表示不限制 (与 ql2 相同)
+    :return: 每轮的步数
+    """
+    if not HAVE_NUMBA:
+        raise RuntimeError("没有安装 numba，请使用 Python 实现")
+    _seed(resolve_seed(seed))
+    return _r_matrix_episodes(np.ascontiguousarray(r, dtype=np.float64), q, float(gamma),
+                              int(episodes), -1 if max_steps is None else int(max_steps))
+
+
+# ==========================================
+# qlrobot.py：Epsilon-Greedy + Q 值更新
+# ==========================================
+
+def make_grid_world(width, height, step_reward=-0.1, goal_reward=10.0):
+    """
+    qlrobot 练习中的网格世界：动作为 u/r/d/l，走出边界则原地不动，
+    右上角为终点。状态编号 y * width + x (y = 0 为最下面一行)
+    :return: (next_state, reward, terminal)，形状分别为 (S, 4)、(S, 4)、(S,)
+    """
+    n_states = width * height
+    goal = n_states - 1
+    next_state = np.empty((n_states, len(ACTIONS)), dtype=np.int64)
+    moves = {'u': (1, 0), 'r': (0, 1), 'd': (-1, 0), 'l': (0, -1)}
+    for s in range(n_states):
+        y, x = divmod(s, width)
+        for a, name in enumerate(ACTIONS):
+            dy, dx = moves[name]
+            ny, nx = y + dy, x + dx
+            next_state[s, a] = ny * width + nx if 0 <= ny < height and 0 <= nx < width else s
+    reward = np.where(next_state == goal, goal_reward, step_reward)
+    terminal = np.zeros(n_states, dtype=np.bool_)
+    terminal[goal] = True
+    return next_state, reward, terminal
+
+
+@_njit
+def _tabular_episodes(next_state, reward, terminal, q, alpha, gamma, epsilon, episodes, start,
+                      max_steps):
+    n_actions = q.shape[1]
+    steps = np.zeros(episodes, dtype=np.int64)
+    for i in range(episodes):
+        state = start
+        count = 0
+        while not terminal[state] and count < max_steps:
+            # choose_action：以 epsilon 的概率随机探索，否则取 Q 值最大的动作 (并列时取第一个)
+            if np.random.random() < epsilon:
+                action = np.random.randint(0, n_actions)
+            else:
+                action = np.argmax(q[state])
+            # update_q_table：Q(s,a) <- Q(s,a) + alpha * [r + gamma * max Q(s') - Q(s,a)]
+            s_next = next_state[state, action]
+            target = reward[state, action] + gamma * q[s_next].max()
+            q[state, action] += alpha * (target - q[state, action])
+            state = s_next
+            count += 1
+        steps[i] = count
+    return steps
+
+
+def _tabular_episodes_python(next_state, reward, terminal, q, alpha, gamma, epsilon, episodes,
+                             start, max_steps, seed):
+    """原来的实现：逐步调用 qlrobot.choose_action / update_q_table (使用全局 random)"""
+    from qlrobot import choose_action, update_q_table
+
+    random.seed(seed)
+    actions = list(range(q.shape[1]))
+    # 预先填满所有动作，choose_action 才会与数组版本一样在全部动作中取最大值
+    q_table = {s: {a: float(q[s, a]) for a in actions} for s in range(len(q))}
+    steps = np.zeros(episodes, dtype=np.int64)
+    for i in range(episodes):
+        state = start
+        count = 0
+        while not terminal[state] and count < max_steps:
+            action = choose_action(state, q_table, epsilon, actions, verbose=False)
+            s_next = int(next_state[state, action])
+            update_q_table(q_table, state, action, reward[state, action], s_next, alpha, gamma, actions)
+            state = s_next
+            count += 1
+        steps[i] = count
+    for s, row in q_table.items():
+        for a, value in row.items():
+            q[s, a] = value
+    return steps
+
+
+def run_tabular(next_state, reward, terminal, q=None, alpha=0.5, gamma=0.9, epsilon=0.1,
+                episodes=500, start=0, max_steps=1000, seed=None, backend='auto'):
+    """
+    在网格世界上运行 Epsilon-Greedy Q-Learning
+    :param backend: 'numba' | 'python' | 'auto' (有 Numba 时用编译内核，否则退回 Python)
+    :return: (q, 每轮步数)
+    """
+    if backend == 'auto':
+        backend = 'numba' if HAVE_NUMBA else 'python'
+    q = np.zeros(next_state.shape) if q is None else q
+    seed = resolve_seed(seed)
+    if backend == 'python':
+        steps = _tabular_episodes_python(next_state, reward, terminal, q, alpha, gamma, epsilon,
+                                         episodes, start, max_steps, seed)
+        return q, steps
+    if not HAVE_NUMBA:
+        raise RuntimeError("没有安装 numba，请使用 backend='python'")
+    _seed(seed)
+    steps = _tabular_episodes(next_state, np.asarray(reward, dtype=np.float64), terminal, q,
+                              float(alpha), float(gamma), float(epsilon), int(episodes), int(start),
+                              int(max_steps))
+    return q, steps
@@ -5,13 +5,14 @@ import random
 # 第一部分：算法核心逻辑实现
 # ==========================================
 
-def choose_action(state, q_table, epsilon, actions=['u', 'r', 'd', 'l']):
+def choose_action(state, q_table, epsilon, actions=['u', 'r', 'd', 'l'], verbose=True):
     """
     实现 Epsilon-Greedy 策略 (对应截图中的编程练习)
     :param state: 当前机器人的状态 (例如 's1')
     :param q_table: 存储 Q 值的字典，格式 {state: {action: q_value}}
     :param epsilon: 探索概率 (0.0 ~ 1.0)
     :param actions: 动作列表
+    :param verbose: 是否打印 DEBUG 信息 (批量训练时关闭)
     :return: 选择的动作
     """
     action = None
@@ -24,13 +25,15 @@ def choose_action(state, q_table, epsilon, actions=['u', 'r', 'd', 'l']):
     if random.uniform(0, 1) < epsilon:
         # 【探索模式】：以 epsilon 的概率随机选择动作
         action = random.choice(actions)
-        print(f"DEBUG: 触发探索 (Random) -> {action}")
+        if verbose:
+            print(f"DEBUG: 触发探索 (Random) -> {action}")
     else:
         # 【利用模式】：选择具有最大 Q 值的动作
         # 使用 max 函数配合 key 参数，找到 value 最大的那个 key
         # 如果有多个最大值，默认取第一个，或者可以添加随机打断逻辑
         action = max(state_actions, key=state_actions.get)
-        print(f"DEBUG: 触发利用 (Max Q) -> {action}")
+        if verbose:
+            print(f"DEBUG: 触发利用 (Max Q) -> {action}")
     # --- 核心逻辑结束 ---
 
     return action
@@ -67,7 +70,7 @@ def update_q_table(q_table, state, action, reward, next_state, alpha, gamma, act
 # 第二部分：运行题目中的具体案例
 # ==========================================
 
-if __name__ == "__main__":
+def run_exercises():
     print("-" * 30)
     print("任务 1: 测试 Epsilon-Greedy 代码逻辑")
     print("-" * 30)
@@ -131,4 +134,8 @@ if __name__ == "__main__":
     print(f"  更新公式: New_Q = {old_q_val} + {alpha} * ({target_q} - {old_q_val})")
     print(f"  最终结果 New Q({current_state}, {current_action}) = {new_q_value:.2f}")
 
-    # 验证是否符合手动计算: 10 + 0.7 * (-0.1 + 0.9*40 - 10) = 28.13
\ No newline at end of file
+    # 验证是否符合手动计算: 10 + 0.7 * (-0.1 + 0.9*40 - 10) = 28.13
+
+
+if __name__ == "__main__":
+    run_exercises()
@@ -0,0 +1,349 @@
+import math
+import os
+from statistics import NormalDist
+
+import numpy as np
+
+BATCH_SIZE = 1 << 20  # 每个任务包含的试验次数
+MIN_TRIALS = 10000  # 提前停止前至少完成的试验次数，样本太少时标准误本身就不可靠
+SAMPLE_CHUNK = 1 << 16  # 采样方式估计时每块生成的点数，决定内存上限
+
+
+class RunningStats:
+    """
+    按批累计的试验统计量，批与批之间可以精确合并
+    每次试验的结果是一个长度为 k 的向量 (例如 [坚持赢, 换门赢])，
+    这里只保存 试验次数 n、结果之和 total、结果平方和 total_sq。
+    """
+
+    def __init__(self, n_outputs=1, dtype=float):
+        self.n = 0
+        self.total = np.zeros(n_outputs, dtype=dtype)
+        self.total_sq = np.zeros(n_outputs, dtype=dtype)
+        self.batches = 0
+        self.seed = None  # 根种子 (SeedSequence.entropy)，用于复现
+        self.stopped_early = False
+
+    def merge(self, n, total, total_sq):
+        # 0/1 结果的和是整数，用整数累加可以保证合并结果与拆分方式无关
+        self.n += n
+        self.total = self.total + total
+        self.total_sq = self.total_sq + total_sq
+        self.batches += 1
+
+    @property
+    def mean(self):
+        return self.total / self.n
+
+    @property
+    def variance(self):
+        """单次试验结果的样本方差"""
+        if self.n < 2:
+            return np.full(self.total.shape, np.nan)
+        total = self.total.astype(float)
+        return (self.total_sq - total * total / self.n) / (self.n - 1)
+
+    @property
+    def stderr(self):
+        """均值的标准误"""
+        return np.sqrt(self.variance / self.n)
+
+    def confidence_interval(self, confidence=0.95):
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        half_width = z * self.stderr
+        return self.mean - half_width, self.mean + half_width
+
+
+def _sufficient_stats(outcomes):
+    """一批结果的 (n, 和, 平方和)；布尔结果按整数累加"""
+    outcomes = np.asarray(outcomes)
+    if outcomes.ndim == 1:
+        outcomes = outcomes[:, None]
+    if outcomes.dtype == bool:
+        outcomes = outcomes.astype(np.int64)
+    return len(outcomes), outcomes.sum(axis=0), (outcomes * outcomes).sum(axis=0)
+
+
+def _run_batch(trial_fn, seed_seq, n):
+    """在子进程中执行一批试验，只把充分统计量传回主进程"""
+    rng = np.random.default_rng(seed_seq)
+    return _sufficient_stats(trial_fn(rng, n))
+
+
+def run_trials(trial_fn, n_trials, batch_size=BATCH_SIZE, workers=None, seed=None,
+               target_se=None, min_trials=MIN_TRIALS, callback=None):
+    """
+    把 n_trials 次试验拆成若干批，分配到进程池中并行执行
+    :param trial_fn: 模块级函数 trial_fn(rng, n)，返回形状为 (n,) 或 (n, k) 的试验结果
+    :param n_trials: 最多执行的试验次数
+    :param batch_size: 每批的试验次数
+    :param workers: 进程数，默认为 CPU 核数；为 1 时在当前进程内顺序执行
+    :param seed: 根种子；每一批使用从它派生 (spawn) 出的独立随机数流
+    :param target_se: 目标标准误，所有输出的标准误都不超过它时提前停止
+                      (标准误为 0 说明结果还没有出现变化，不算收敛)
+    :param min_trials: 提前停止前至少要完成的试验次数
+    :param callback: 每合并一批后调用 callback(stats)，可用来输出进度
+    :return: RunningStats
+    :raises ValueError: n_trials 或 batch_size 不是正数
+    """
+    if n_trials <= 0 or batch_size <= 0:
+        raise ValueError(f"试验次数和每批次数必须为正数: n_trials={n_trials}, batch_size={batch_size}")
+    root = np.random.SeedSequence(seed)
+    n_batches = math.ceil(n_trials / batch_size)
+    stats = None
+
+    def batches():
+        # 第 i 批总是使用第 i 个子种子，所以结果与进程数无关
+        for i in range(n_batches):
+            yield root.spawn(1)[0], min(batch_size, n_trials - i * batch_size)
+
+    def accept(result):
+        nonlocal stats
+        n, total, total_sq = result
+        if stats is None:
+            stats = RunningStats(len(total), total.dtype)
+            stats.seed = root.entropy
+        stats.merge(n, total, total_sq)
+        if callback is not None:
+            callback(stats)
+        if target_se is None or stats.n < max(min_trials, 2):
+            return False
+        stderr = stats.stderr
+        return bool(np.all((stderr > 0) & (stderr <= target_se)))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        for seed_seq, n in batches():
+            if accept(_run_batch(trial_fn, seed_seq, n)):
+                stats.stopped_early = stats.n < n_trials
+                break
+        return stats
+
+    from concurrent.futures import ProcessPoolExecutor  # 只在并行时才需要
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        todo = batches()
+        # 保持每个进程最多两批在排队，结果按批次顺序合并，保证可复现
+        for seed_seq, n in todo:
+            pending.append(pool.submit(_run_batch, trial_fn, seed_seq, n))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            done = accept(pending.pop(0).result())
+            if done:
+                stats.stopped_early = stats.n < n_trials
+                for future in pending:
+                    future.cancel()
+                break
+            for seed_seq, n in todo:
+                pending.append(pool.submit(_run_batch, trial_fn, seed_seq, n))
+                break
+    return stats
+
+
+# ==========================================
+# 方差缩减：不同的均匀采样方式
+# ==========================================
+
+PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53]
+
+
+def _iid(rng, n, dim):
+    return rng.random((n, dim))
+
+
+def _antithetic(rng, n, dim):
+    # 对偶变量：u 与 1 - u 成对出现，两者负相关，平均后方差更小
+    half = rng.random(((n + 1) // 2, dim))
+    return np.concatenate([half, 1.0 - half])[:n]
+
+
+def _latin_hypercube(rng, n, dim):
+    # 拉丁超立方：每一维都被等分成 n 层，每层恰好一个点
+    strata = np.argsort(rng.random((n, dim)), axis=0)
+    return (strata + rng.random((n, dim))) / n
+
+
+def _halton_points(start, n, dim):
+    """Halton 序列的第 start+1 .. start+n 个点 (未平移)"""
+    if dim > len(PRIMES):
+        raise ValueError(f"Halton 序列最多支持 {len(PRIMES)} 维")
+    points = np.empty((n, dim))
+    for d in range(dim):
+        base = PRIMES[d]
+        # 逐位计算 start+1 .. start+n 的 base 进制根式反演 (radical inverse)
+        index = np.arange(start + 1, start + n + 1)
+        value = np.zeros(n)
+        scale = 1.0 / base
+        while index.any():
+            index, digit = np.divmod(index, base)
+            value += digit * scale
+            scale /= base
+        points[:, d] = value
+    return points
+
+
+def _halton(rng, n, dim):
+    points = _halton_points(0, n, dim)
+    # 随机平移 (Cranley-Patterson 旋转)，使每个重复之间相互独立，才能估计误差
+    return (points + rng.random(dim)) % 1.0
+
+
+def _sobol_engine(rng, dim):
+    try:
+        from scipy.stats import qmc
+    except ImportError:
+        raise ImportError("sobol 采样需要安装 scipy") from None
+    return qmc.Sobol(dim, scramble=True, seed=rng)
+
+
+def _sobol_draw(engine, n):
+    import warnings
+    with warnings.catch_warnings():
+        # n 不是 2 的幂时 scipy 会提醒平衡性变差，这里不影响无偏性
+        warnings.simplefilter("ignore", UserWarning)
+        return engine.random(n)
+
+
+def _sobol(rng, n, dim):
+    return _sobol_draw(_sobol_engine(rng, dim), n)
+
+
+SAMPLERS = {
+    'iid': _iid,
+    'antithetic': _antithetic,
+    'lhs': _latin_hypercube,
+    'halton': _halton,
+    'sobol': _sobol,
+}
+
+
+def sample_uniform(rng, n, dim, method='iid'):
+    """
+    在 [0, 1)^dim 中生成 n 个点
+    :param method: 'iid' | 'antithetic' | 'lhs' | 'halton' | 'sobol'
+    :return: 形状为 (n, dim) 的数组
+    """
+    if method not in SAMPLERS:
+        raise ValueError(f"未知的采样方式: {method}，可选 {list(SAMPLERS)}")
+    return SAMPLERS[method](rng, n, dim)
+
+
+def iter_uniform(rng, n, dim, method='iid', chunk_size=SAMPLE_CHUNK):
+    """
+    分块生成 n 个点，内存只与 chunk_size 有关
+    halton / sobol 在块之间接着同一个序列生成；lhs 在每块内部分层 (每块是一个独立的拉丁超立方)
+    :return: 生成器，每次产出形状为 (m, dim) 的数组
+    """
+    if method not in SAMPLERS:
+        raise ValueError(f"未知的采样方式: {method}，可选 {list(SAMPLERS)}")
+    sizes = [min(chunk_size, n - start) for start in range(0, n, chunk_size)]
+    if method == 'halton':
+        shift = rng.random(dim)
+        for start, size in zip(range(0, n, chunk_size), sizes):
+            yield (_halton_points(start, size, dim) + shift) % 1.0
+    elif method == 'sobol':
+        engine = _sobol_engine(rng, dim)
+        for size in sizes:
+            yield _sobol_draw(engine, size)
+    else:
+        for size in sizes:
+            yield SAMPLERS[method](rng, size, dim)
+
+
+class SamplingResult:
+    """
+    用 R 个独立重复估计出的均值与误差
+    对偶/分层/拟随机采样的点之间不独立，不能直接用 i.i.d. 公式算标准误，
+    所以把样本分成 R 个独立的重复，用重复均值之间的离散程度估计误差。
+    """
+
+    def __init__(self, method, replicate_means, sample_variance, n):
+        self.method = method
+        self.replicate_means = replicate_means  # 形状 (R, k)
+        self.sample_variance = sample_variance  # 单个样本的方差 (i.i.d. 基准)
+        self.n = n
+
+    @property
+    def replicates(self):
+        return len(self.replicate_means)
+
+    @property
+    def mean(self):
+        return self.replicate_means.mean(axis=0)
+
+    @property
+    def stderr(self):
+        return self.replicate_means.std(axis=0, ddof=1) / np.sqrt(self.replicates)
+
+    @property
+    def effective_sample_size(self):
+        """达到同样误差所需的 i.i.d. 样本数：sigma^2 / Var(估计量)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.sample_variance / self.stderr ** 2
+
+    @property
+    def variance_reduction(self):
+        """方差缩减倍数 (相对 i.i.d. 采样)，大于 1 表示更好"""
+        return self.effective_sample_size / self.n
+
+    @property
+    def error_reduction(self):
+        """标准误缩小的倍数"""
+        return np.sqrt(self.variance_reduction)
+
+
+def _summarize_stats(method, replicate_stats):
+    """由每个重复的 RunningStats 得到 SamplingResult；合并后的方差作为 i.i.d. 基准"""
+    pooled = RunningStats(len(replicate_stats[0].total), replicate_stats[0].total.dtype)
+    for stats in replicate_stats:
+        pooled.merge(stats.n, stats.total, stats.total_sq)
+    replicate_means = np.array([stats.mean for stats in replicate_stats], dtype=float)
+    return SamplingResult(method, replicate_means, pooled.variance, pooled.n)
+
+
+def summarize_replicates(method, outputs):
+    """
+    :param outputs: 长度为 R 的列表，每个元素是一个重复内所有样本的结果，形状 (m,) 或 (m, k)
+    """
+    replicate_stats = []
+    for y in outputs:
+        n, total, total_sq = _sufficient_stats(y)
+        stats = RunningStats(len(total), total.dtype)
+        stats.merge(n, total, total_sq)
+        replicate_stats.append(stats)
+    return _summarize_stats(method, replicate_stats)
+
+
+def estimate_mean(integrand, n_samples, dim, method='iid', replicates=32, seed=None,
+                  chunk_size=SAMPLE_CHUNK):
+    """
+    用指定的采样方式估计 E[integrand(U)]，U 在 [0, 1)^dim 上均匀分布
+    每个重复分块生成样本，只累计和与平方和，内存与 n_samples 无关
+    :param integrand: integrand(u)，u 的形状为 (m, dim)，返回形状 (m,) 或 (m, k)
+    :param n_samples: 总样本数，平均分到 replicates 个重复中；样本数不会超过它：
+                      少于 replicates 时减少重复数，不能整除时舍去余数，两种情况都会输出说明
+    :return: SamplingResult
+    """
+    if n_samples < 2 or replicates < 2:
+        raise ValueError(f"样本数和重复数都至少为 2: n_samples={n_samples}, replicates={replicates}")
+    if n_samples < replicates:
+        print(f"注意: 样本数 {n_samples} 少于重复数 {replicates}，重复数减少为 {n_samples}")
+        replicates = n_samples
+    per_rep = n_samples // replicates
+    if per_rep * replicates != n_samples:
+        print(f"注意: 样本数 {n_samples} 不能被 {replicates} 个重复整除，实际使用 {per_rep * replicates} 个")
+    rng = np.random.default_rng(seed)
+    replicate_stats = []
+    for _ in range(replicates):
+        stats = None
+        for u in iter_uniform(rng, per_rep, dim, method, chunk_size):
+            n, total, total_sq = _sufficient_stats(integrand(u))
+            if stats is None:
+                stats = RunningStats(len(total), total.dtype)
+            stats.merge(n, total, total_sq)
+        replicate_stats.append(stats)
+    return _summarize_stats(method, replicate_stats)
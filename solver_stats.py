@@ -0,0 +1,145 @@
+"""
+求解器调用的计时与规模统计
+每次求解记录: 建模耗时、求解耗时 (墙钟)、结果提取耗时、变量数/约束数，
+以及求解器能提供时的分支节点数与 MIP Gap；最后汇总成一次运行的报告，
+用来判断场景规模变大时瓶颈在 Python 建模还是在求解器本身。
+"""
+import time
+from contextlib import contextmanager, nullcontext
+
+PHASES = ('build', 'solve', 'extract')
+
+
+class SolveRecord:
+    """一次求解的统计信息"""
+
+    def __init__(self, name):
+        self.name = name
+        self.times = {p: 0.0 for p in PHASES}
+        self.n_vars = None
+        self.n_constrs = None
+        self.node_count = None
+        self.mip_gap = None
+        self.solver_time = None  # 求解器自己报告的时间 (如 Gurobi 的 Runtime)
+        self.status = None
+
+    @contextmanager
+    def phase(self, name):
+        """累计某个阶段的耗时，同一阶段可以多次进入"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] += time.perf_counter() - start
+
+
+def phase(record, name):
+    """record 为 None 时不做任何事，方便在不需要统计时保持调用代码不变"""
+    return nullcontext() if record is None else record.phase(name)
+
+
+def gurobi_model_stats(record, model):
+    """从求解后的 Gurobi 模型中读取规模与求解信息"""
+    if record is None:
+        return
+    record.n_vars = model.NumVars
+    record.n_constrs = model.NumConstrs
+    record.status = model.Status
+    record.solver_time = model.Runtime
+    # 只有 MIP 模型才有节点数和 Gap，LP 或未求解时读取会报错
+    for attr, key in (('node_count', 'NodeCount'), ('mip_gap', 'MIPGap')):
+        try:
+            setattr(record, attr, getattr(model, key))
+        except Exception:
+            pass
+
+
+def pulp_model_stats(record, prob):
+    """从 PuLP 问题中读取规模与求解信息 (CBC 不通过 PuLP 报告节点数和 Gap)"""
+    if record is None:
+        return
+    import pulp
+    record.n_vars = prob.numVariables()
+    record.n_constrs = prob.numConstraints()
+    record.status = pulp.LpStatus[prob.status]
+    record.solver_time = getattr(prob, 'solutionTime', None)
+
+
+class SolverProfiler:
+    """
+    收集一次运行中所有求解的记录，可选地用 cProfile 采集 Python 侧的调用栈
+    :param profile: 是否在 profiling() 中开启 cProfile
+    """
+
+    def __init__(self, profile=False):
+        self.records = []
+        self.profile = profile
+        self._profiler = None
+        self.wall_time = 0.0
+
+    def new_record(self, name):
+        record = SolveRecord(name)
+        self.records.append(record)
+        return record
+
+    @contextmanager
+    def profiling(self):
+        """包住整个运行过程：统计总耗时，profile=True 时同时运行 cProfile"""
+        if self.profile:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.wall_time += time.perf_counter() - start
+            if self._profiler is not None:
+                self._profiler.disable()
+
+    def summary(self):
+        """各阶段的总耗时、平均与最大耗时，以及模型规模的范围"""
+        n = len(self.records)
+        result = {'solves': n, 'wall_time': self.wall_time}
+        for p in PHASES:
+            times = [r.times[p] for r in self.records]
+            result[p] = {
+                'total': sum(times),
+                'mean': sum(times) / n if n else 0.0,
+                'max': max(times, default=0.0),
+            }
+        for key in ('n_vars', 'n_constrs', 'node_count'):
+            values = [getattr(r, key) for r in self.records if getattr(r, key) is not None]
+            result[key] = (min(values), max(values)) if values else None
+        gaps = [r.mip_gap for r in self.records if r.mip_gap is not None]
+        result['max_mip_gap'] = max(gaps) if gaps else None
+        return result
+
+    def print_summary(self, top=15, profile_output=None):
+        s = self.summary()
+        print("\n" + "=" * 60)
+        print(f"求解统计: 共 {s['solves']} 次求解, 总耗时 {s['wall_time']:.3f}s")
+        print("=" * 60)
+        print(f"{'阶段':<10} | {'总计 (s)':>10} | {'平均 (ms)':>10} | {'最大 (ms)':>10}")
+        for p in PHASES:
+            print(f"{p:<10} | {s[p]['total']:>10.4f} | {s[p]['mean'] * 1000:>10.2f} | {s[p]['max'] * 1000:>10.2f}")
+        for key, label in (('n_vars', '变量数'), ('n_constrs', '约束数'), ('node_count', '节点数')):
+            if s[key] is not None:
+                print(f"{label}: {s[key][0]:g} ~ {s[key][1]:g}")
+        if s['max_mip_gap'] is not None:
+            print(f"最大 MIP Gap: {s['max_mip_gap']:.2e}")
+        # 建模 + 提取都是 Python 侧的开销，和求解时间对比即可看出瓶颈
+        python_side = s['build']['total'] + s['extract']['total']
+        bottleneck = "Python 建模/提取" if python_side > s['solve']['total'] else "求解器"
+        print(f"瓶颈: {bottleneck} (Python 侧 {python_side:.4f}s vs 求解 {s['solve']['total']:.4f}s)")
+        if self._profiler is not None:
+            import io
+            import pstats
+            stream = io.StringIO()
+            stats = pstats.Stats(self._profiler, stream=stream).sort_stats('cumulative')
+            stats.print_stats(top)
+            print(f"\n--- cProfile (按累计耗时前 {top} 项) ---")
+            print(stream.getvalue())
+            if profile_output:
+                stats.dump_stats(profile_output)
+                print(f"cProfile 数据已保存为 {profile_output}")
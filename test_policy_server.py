@@ -0,0 +1,72 @@
+"""
+策略服务的批处理与热更新测试：python -m pytest test_policy_server.py
+"""
+import asyncio
+import json
+
+import policy_server
+
+Q_TABLE = {
+    's1': {'u': 10, 'r': -0.29, 'd': -0.29, 'l': 0},
+    's2': {'u': -24, 'r': -13, 'd': -0.29, 'l': 40},
+    's3': {'u': -20, 'r': -20, 'd': 10, 'l': -20},
+    's4': {'u': 0, 'r': 0, 'd': 0, 'l': 0},
+}
+
+
+async def run_with_server(scenario, **kwargs):
+    server = policy_server.PolicyServer(Q_TABLE, seed=0, **kwargs)
+    port = await server.start(port=0)
+    client = policy_server.PolicyClient()
+    await client.connect(port=port)
+    try:
+        return await scenario(server, client)
+    finally:
+        await client.close()
+        await server.close()
+
+
+def test_all_requests_answered_during_reload(tmp_path):
+    # 更新后的检查点：s1 的最优动作从 u 变为 r
+    updated = {state: dict(row) for state, row in Q_TABLE.items()}
+    updated['s1']['r'] = 50
+    (tmp_path / "q.json").write_text(json.dumps(updated), encoding="utf-8")
+    states = list(Q_TABLE) + ['unknown']
+    n_requests = 5000
+
+    async def scenario(server, client):
+        assert await client.choose_action('s1') == 'u'
+        semaphore = asyncio.Semaphore(200)
+
+        async def one(i):
+            async with semaphore:
+                return await client.choose_action(states[i % len(states)], 0.1)
+
+        tasks = [asyncio.create_task(one(i)) for i in range(n_requests)]
+        await asyncio.sleep(0)
+        reloaded = await client.reload('q.json')
+        results = await asyncio.wait_for(asyncio.gather(*tasks), 30)
+        return reloaded, results, await client.choose_action('s1'), await client.stats()
+
+    reloaded, results, after, stats = asyncio.run(
+        run_with_server(scenario, max_delay=0.005, reload_dir=tmp_path))
+    assert reloaded['ok'] and reloaded['states'] == 4
+    assert len(results) == n_requests
+    assert set(results) <= set(policy_server.ACTIONS)
+    assert after == 'r'
+    assert stats['version'] == 2
+    assert stats['served'] == n_requests + 2
+    # 并发请求确实被合并成了批次
+    assert stats['mean_batch'] > 1
+
+
+def test_bad_request_does_not_block_later_requests():
+    async def scenario(server, client):
+        bad = await client.request(state=['bad'])
+        bad_epsilon = await client.request(state='s1', epsilon='x')
+        return bad, bad_epsilon, await client.choose_action('s2')
+
+    bad, bad_epsilon, action = asyncio.run(run_with_server(scenario))
+    assert 'error' in bad and bad['id'] == 1
+    assert 'error' in bad_epsilon and bad_epsilon['id'] == 2
+    assert action == 'l'
@@ -0,0 +1,62 @@
+"""
+编译内核与原 Python 实现的一致性测试：python -m pytest test_ql_kernels.py
+两条路径使用不同的随机数发生器，所以比较的是收敛结果和多次运行的平均 Q 表。
+"""
+import numpy as np
+import pytest
+
+import ql
+import ql_kernels
+
+needs_numba = pytest.mark.skipif(not ql_kernels.HAVE_NUMBA, reason="没有安装 numba")
+
+
+@needs_numba
+def test_r_matrix_kernel_converges_to_python_q_table():
+    # 确定性环境下两种实现都收敛到同一个不动点
+    q_python, _ = ql.train(episodes=3000, seed=0)
+    q_jit, steps = ql.train(episodes=3000, seed=0, jit=True)
+    assert len(steps) == 3000
+    assert max(steps) <= 101
+    np.testing.assert_allclose(q_jit, q_python)
+
+
+@needs_numba
+def test_r_matrix_kernel_without_step_limit():
+    q = np.zeros(ql.r.shape)
+    steps = ql_kernels.r_matrix_episodes(ql.r, q, 0.8, 3000, max_steps=None, seed=1)
+    q_expected, _ = ql.plan_prioritized_sweeping(ql.r, 0.8)
+    assert steps.min() >= 1
+    np.testing.assert_allclose(q, q_expected)
+
+
+@needs_numba
+def test_tabular_kernel_matches_qlrobot_statistically():
+    next_state, reward, terminal = ql_kernels.make_grid_world(3, 3)
+    runs = {'python': [], 'numba': []}
+    for backend, tables in runs.items():
+        for seed in range(20):
+            q, _ = ql_kernels.run_tabular(next_state, reward, terminal, alpha=0.5, gamma=0.9,
+                                          epsilon=0.2, episodes=60, seed=seed, backend=backend)
+            tables.append(q)
+    python, jit = np.array(runs['python']), np.array(runs['numba'])
+    # 两组平均 Q 表之差应在几个标准误之内
+    se = np.sqrt(python.var(axis=0, ddof=1) / len(python) + jit.var(axis=0, ddof=1) / len(jit))
+    assert np.all(np.abs(python.mean(axis=0) - jit.mean(axis=0)) <= 5 * se + 1e-6)
+    # 充分探索后两者都收敛到最优状态价值 (最优动作可能并列，所以不比较 argmax)
+    values = []
+    for backend in ('python', 'numba'):
+        q, _ = ql_kernels.run_tabular(next_state, reward, terminal, epsilon=0.5, episodes=2000,
+                                      seed=0, backend=backend)
+        values.append(q[~terminal].max(axis=1))
+    np.testing.assert_allclose(values[0], values[1], atol=1e-3)
+
+
+def test_fallback_without_numba(monkeypatch):
+    monkeypatch.setattr(ql_kernels, 'HAVE_NUMBA', False)
+    q, steps = ql.train(episodes=2000, seed=0, jit=True)
+    assert len(steps) == 2000
+    assert q[4, 6] == 100
+    next_state, reward, terminal = ql_kernels.make_grid_world(2, 2)
+    q, steps = ql_kernels.run_tabular(next_state, reward, terminal, episodes=50, seed=0)
+    assert q[2, 1] > 0  # 左上角向右一步到达终点
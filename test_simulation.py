@@ -0,0 +1,37 @@
+"""
+simulation.run_trials 提前停止的测试：python -m pytest test_simulation.py
+"""
+import math
+
+import numpy as np
+
+import simulation
+import work7
+
+
+def constant_trials(rng, n):
+    """每次试验的结果都相同，标准误恒为 0"""
+    return np.ones(n, dtype=bool)
+
+
+def test_zero_stderr_does_not_stop_early():
+    stats = simulation.run_trials(constant_trials, 5000, batch_size=100, workers=1, seed=0,
+                                  target_se=0.1, min_trials=2)
+    assert stats.n == 5000
+    assert not stats.stopped_early
+
+
+def test_single_point_batches_respect_min_trials():
+    # 每批一个点时，前两个点相同就会得到标准误 0，之前会在第 2 次试验就停止
+    for seed in range(4):
+        estimate, half_width, stats = work7.estimate_pi_parallel(
+            100000, workers=1, seed=seed, precision=0.05, batch_size=1, min_trials=2000)
+        assert stats.n >= 2000
+        assert 0 < half_width <= 0.05
+        assert abs(estimate - math.pi) < 0.2
+
+
+def test_default_min_trials():
+    _, _, stats = work7.estimate_pi_parallel(100000, workers=1, seed=0, precision=0.5, batch_size=100)
+    assert stats.stopped_early
+    assert stats.n >= simulation.MIN_TRIALS
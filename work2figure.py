@@ -1,7 +1,5 @@
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-
 def draw_decision_tree():
+    import matplotlib.pyplot as plt  # 只有画图时才导入 matplotlib
     # 设置支持中文的字体（根据您的系统环境可能需要调整，如 SimHei, Microsoft YaHei 等）
     plt.rcParams['font.sans-serif'] = ['SimHei']
     plt.rcParams['axes.unicode_minus'] = False
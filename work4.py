@@ -1,67 +1,95 @@
+import argparse
 import gurobipy as gp
 from gurobipy import GRB
-import random
-import pandas as pd
-import matplotlib.pyplot as plt
+import numpy as np
 
-def solve_portfolio_scenario(synergy_ab_val, synergy_cd_val, scenario_id):
-    """针对给定的协同效应值求解最优项目组合"""
-    # 1. 创建模型
-    m = gp.Model(f"Portfolio_Scenario_{scenario_id}")
-    m.setParam('OutputFlag', 0)  # 静默模式，不输出求解日志
-    # 2. 定义数据
-    projects = ['A', 'B', 'C', 'D']
-    costs = {'A': 50, 'B': 40, 'C': 55, 'D': 35}
-    returns = {'A': 100, 'B': 80, 'C': 110, 'D': 60}
-    budget = 150
-    # 3. 定义变量 (0-1 变量)
-    x = m.addVars(projects, vtype=GRB.BINARY, name="x")
-    # 定义协同效应的辅助变量 (线性化 xA*xB 和 xC*xD)
-    # z_ab = 1 当且仅当 A和B都被选中,z_cd = 1 当且仅当 C和D都被选中
-    z_ab = m.addVar(vtype=GRB.BINARY, name="z_ab")
-    z_cd = m.addVar(vtype=GRB.BINARY, name="z_cd")
-    # 4. 设置约束
-    # 预算约束
-    m.addConstr(gp.quicksum(x[i] * costs[i] for i in projects) <= budget, name="Budget")
-    # 协同效应逻辑约束 (Linearization)
-    # z_ab <= x['A'], z_ab <= x['B'], z_ab >= x['A'] + x['B'] - 1
-    m.addConstr(z_ab <= x['A'])
-    m.addConstr(z_ab <= x['B'])
-    m.addConstr(z_ab >= x['A'] + x['B'] - 1)
-    # z_cd <= x['C'], z_cd <= x['D'], z_cd >= x['C'] + x['D'] - 1
-    m.addConstr(z_cd <= x['C'])
-    m.addConstr(z_cd <= x['D'])
-    m.addConstr(z_cd >= x['C'] + x['D'] - 1)
-    # 5. 设置目标函数：最大化 (基础收益 + 协同收益)
-    base_return = gp.quicksum(x[i] * returns[i] for i in projects)
-    synergy_return = (synergy_ab_val * z_ab) + (synergy_cd_val * z_cd)
-    m.setObjective(base_return + synergy_return, GRB.MAXIMIZE)
+from simulation import SAMPLERS, sample_uniform, summarize_replicates
+from solver_stats import SolverProfiler, gurobi_model_stats, phase
+
+def solve_portfolio_scenario(synergy_ab_val, synergy_cd_val, scenario_id, profiler=None):
+    """
+    针对给定的协同效应值求解最优项目组合
+    :param profiler: SolverProfiler，传入时记录建模/求解/提取的耗时与模型规模
+    """
+    record = None if profiler is None else profiler.new_record(f"Scenario_{scenario_id}")
+    with phase(record, 'build'):
+        # 1. 创建模型
+        m = gp.Model(f"Portfolio_Scenario_{scenario_id}")
+        m.setParam('OutputFlag', 0)  # 静默模式，不输出求解日志
+        # 2. 定义数据
+        projects = ['A', 'B', 'C', 'D']
+        costs = {'A': 50, 'B': 40, 'C': 55, 'D': 35}
+        returns = {'A': 100, 'B': 80, 'C': 110, 'D': 60}
+        budget = 150
+        # 3. 定义变量 (0-1 变量)
+        x = m.addVars(projects, vtype=GRB.BINARY, name="x")
+        # 定义协同效应的辅助变量 (线性化 xA*xB 和 xC*xD)
+        # z_ab = 1 当且仅当 A和B都被选中,z_cd = 1 当且仅当 C和D都被选中
+        z_ab = m.addVar(vtype=GRB.BINARY, name="z_ab")
+        z_cd = m.addVar(vtype=GRB.BINARY, name="z_cd")
+        # 4. 设置约束
+        # 预算约束
+        m.addConstr(gp.quicksum(x[i] * costs[i] for i in projects) <= budget, name="Budget")
+        # 协同效应逻辑约束 (Linearization)
+        # z_ab <= x['A'], z_ab <= x['B'], z_ab >= x['A'] + x['B'] - 1
+        m.addConstr(z_ab <= x['A'])
+        m.addConstr(z_ab <= x['B'])
+        m.addConstr(z_ab >= x['A'] + x['B'] - 1)
+        # z_cd <= x['C'], z_cd <= x['D'], z_cd >= x['C'] + x['D'] - 1
+        m.addConstr(z_cd <= x['C'])
+        m.addConstr(z_cd <= x['D'])
+        m.addConstr(z_cd >= x['C'] + x['D'] - 1)
+        # 5. 设置目标函数：最大化 (基础收益 + 协同收益)
+        base_return = gp.quicksum(x[i] * returns[i] for i in projects)
+        synergy_return = (synergy_ab_val * z_ab) + (synergy_cd_val * z_cd)
+        m.setObjective(base_return + synergy_return, GRB.MAXIMIZE)
     # 6. 求解
-    m.optimize()
+    with phase(record, 'solve'):
+        m.optimize()
+    gurobi_model_stats(record, m)
     # 7. 提取结果
-    if m.status == GRB.OPTIMAL:
-        selected = [p for p in projects if x[p].x > 0.5]
-        total_return = m.ObjVal
-        return sorted(selected), total_return
-    else:
-        return None, 0
+    with phase(record, 'extract'):
+        if m.status == GRB.OPTIMAL:
+            selected = [p for p in projects if x[p].x > 0.5]
+            total_return = m.ObjVal
+            return sorted(selected), total_return
+        else:
+            return None, 0
 
-def robust_decision_analysis():
-    # 模拟次数
-    num_scenarios = 150
+def robust_decision_analysis(num_scenarios=150, method='iid', replicates=10, seed=None, profiler=None):
+    """
+    :param num_scenarios: 模拟次数 (即求解器调用次数)
+    :param method: 协同效应的采样方式 'iid' | 'antithetic' | 'lhs' | 'halton' | 'sobol'
+    :param replicates: 把场景分成几组独立重复，用于估计期望收益的误差和有效样本量
+    :param profiler: SolverProfiler，传入时记录每次求解的统计信息
+    求解次数不会超过 num_scenarios：场景数少于 replicates 时减少重复组数，
+    不能整除时舍去余数，两种情况都会在输出中说明
+    """
+    if num_scenarios < 2 or replicates < 2:
+        raise ValueError(f"场景数和重复组数都至少为 2: num_scenarios={num_scenarios}, replicates={replicates}")
+    if num_scenarios < replicates:
+        print(f"注意: 场景数 {num_scenarios} 少于重复组数 {replicates}，重复组数减少为 {num_scenarios}")
+        replicates = num_scenarios
+    rng = np.random.default_rng(seed)
+    per_rep = num_scenarios // replicates
+    if per_rep * replicates != num_scenarios:
+        print(f"注意: 场景数 {num_scenarios} 不能被 {replicates} 组整除，实际运行 {per_rep * replicates} 次")
+    num_scenarios = per_rep * replicates
+    # 每组重复内部用指定方式在 [0, 1)^2 中取点，再映射到协同效应的取值范围
+    u = np.concatenate([sample_uniform(rng, per_rep, 2, method) for _ in range(replicates)])
     results = []
-    print(f"--- 开始 {num_scenarios} 次不确定性模拟 ---")
+    print(f"--- 开始 {num_scenarios} 次不确定性模拟 (采样方式: {method}) ---")
     print(f"{'场景':<5} | {'AB协同':<8} | {'CD协同':<8} | {'最优组合':<15} | {'总收益':<8}")
     print("-" * 60)
     decision_counts = {}
     for i in range(num_scenarios):
-        # 随机生成协同效应值 (均匀分布)
+        # 协同效应值 (均匀分布)
         # A和B协同: [10, 40]
-        syn_ab = random.uniform(10, 40)
+        syn_ab = 10 + 30 * u[i, 0]
         # C和D协同: [20, 50]
-        syn_cd = random.uniform(20, 50)
+        syn_cd = 20 + 30 * u[i, 1]
         # 求解
-        selected_projects, profit = solve_portfolio_scenario(syn_ab, syn_cd, i + 1)
+        selected_projects, profit = solve_portfolio_scenario(syn_ab, syn_cd, i + 1, profiler)
         combo_str = "+".join(selected_projects)
         # 记录
         results.append({
@@ -81,10 +109,37 @@ def robust_decision_analysis():
     for combo, count in decision_counts.items():
         print(f"  组合 [{combo}]: {count} 次 (占比 {count / num_scenarios * 100:.1f}%)")
     print(f"推荐的鲁棒决策是: **{best_decision}**")
+    # 期望收益的估计精度：有效样本量表示 i.i.d. 采样需要多少次求解才能达到同样的误差
+    profits = np.array([r['Profit'] for r in results]).reshape(replicates, per_rep)
+    summary = summarize_replicates(method, list(profits))
+    print(f"期望收益: {summary.mean[0]:.2f} ± {summary.stderr[0]:.2f} | "
+          f"有效样本量 {summary.effective_sample_size[0]:.0f} / {summary.n}, "
+          f"误差缩小 {summary.error_reduction[0]:.2f} 倍")
     # 可选：计算最坏情况 (Max-Min Robustness)
     # 最坏情况：协同效应取下限 AB=10, CD=20
-    wc_combo, wc_profit = solve_portfolio_scenario(10, 20, "WorstCase")
+    wc_combo, wc_profit = solve_portfolio_scenario(10, 20, "WorstCase", profiler)
     print(f"[验证] 最坏情况 (AB=10, CD=20) 下的最优解: {'+'.join(wc_combo)} (收益: {wc_profit})")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="项目组合的鲁棒性分析 (Gurobi)")
+    parser.add_argument("-n", "--scenarios", type=int, default=150, help="模拟场景数 (求解次数)")
+    parser.add_argument("--method", default="iid", choices=list(SAMPLERS), help="协同效应的采样方式")
+    parser.add_argument("--replicates", type=int, default=10, help="独立重复的组数")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    parser.add_argument("--stats", action="store_true", help="输出每个阶段的耗时与模型规模汇总")
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="FILE",
+                        help="同时用 cProfile 采集 Python 侧耗时 (可选保存到 FILE)")
+    args = parser.parse_args(argv)
+    if args.scenarios < 2 or args.replicates < 2:
+        parser.error("-n/--scenarios 和 --replicates 都至少为 2")
+    if not args.stats and args.profile is None:
+        robust_decision_analysis(args.scenarios, args.method, args.replicates, args.seed)
+        return
+    profiler = SolverProfiler(profile=args.profile is not None)
+    with profiler.profiling():
+        robust_decision_analysis(args.scenarios, args.method, args.replicates, args.seed, profiler)
+    profiler.print_summary(profile_output=args.profile or None)
+
+
 if __name__ == "__main__":
-    robust_decision_analysis()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -1,47 +1,201 @@
-import random
-import matplotlib.pyplot as plt
-def monty_hall_simulation(n_simulations=1000):
-    switch_wins = 0
+import argparse
+from functools import partial
+
+import numpy as np
+
+from plotting import plot_series, pyplot
+from simulation import MIN_TRIALS, SAMPLERS, estimate_mean, run_trials
+
+BATCH_SIZE = 1 << 20  # 每批模拟的次数，决定内存上限
+
+
+def check_doors(n_doors=3, n_open=1):
+    """门数至少为 3，主持人打开 0 ~ n-2 扇羊门 (至少留下一扇可以换的门)；不合法时抛出 ValueError"""
+    if n_doors < 3:
+        raise ValueError(f"门的数量至少为 3: {n_doors}")
+    if not 0 <= n_open <= n_doors - 2:
+        raise ValueError(f"{n_doors} 扇门时主持人只能打开 0 ~ {n_doors - 2} 扇门: {n_open}")
+
+
+def theoretical_win_rates(n_doors=3, n_open=1):
+    """
+    n 扇门、主持人打开 k 扇羊门时的理论胜率
+    :return: (坚持胜率, 换门胜率)
+    """
+    # 坚持：原选择是车的概率 1/n
+    # 换门：原选择是羊 (n-1)/n，此时车在剩下 n-1-k 扇未打开的门中，随机换到它的概率 1/(n-1-k)
+    return 1 / n_doors, (n_doors - 1) / (n_doors * (n_doors - 1 - n_open))
+
+
+def monty_hall_trials(rng, n, n_doors=3, n_open=1):
+    """
+    向量化地模拟 n 次三门问题 (可推广到 n 扇门、主持人打开 k 扇羊门)
+    :return: 形状为 (n, 2) 的布尔数组，两列分别为 [坚持原选择是否赢, 换门是否赢]
+    """
+    check_doors(n_doors, n_open)
+    # 不需要为每次试验建立门的列表，只需要车的位置和参赛者的选择
+    car_position = rng.integers(0, n_doors, n, dtype=np.int32)
+    choice = rng.integers(0, n_doors, n, dtype=np.int32)
+    stick = car_position == choice
+    # 主持人打开的一定是羊，原选择不是车时，车在剩下的 n-1-k 扇门中，
+    # 参赛者随机换到其中一扇，换到车的概率是 1/(n-1-k)；三门时这一项恒为真
+    remaining = n_doors - 1 - n_open
+    lucky = rng.integers(0, remaining, n, dtype=np.int32) == 0 if remaining > 1 else True
+    switch = ~stick & lucky
+    return np.stack([stick, switch], axis=1)
+
+
+def monty_hall_integrand(u, n_doors=3, n_open=1):
+    """
+    把 [0, 1)^3 中的点映射为一次试验：u0 决定车的位置，u1 决定选择，u2 决定换到哪扇门
+    便于使用对偶/分层/拟随机等采样方式
+    :return: 形状为 (n, 2) 的数组 [坚持是否赢, 换门是否赢]
+    """
+    check_doors(n_doors, n_open)
+    car_position = np.floor(u[:, 0] * n_doors)
+    choice = np.floor(u[:, 1] * n_doors)
+    stick = car_position == choice
+    lucky = np.floor(u[:, 2] * (n_doors - 1 - n_open)) == 0
+    return np.stack([stick, ~stick & lucky], axis=1)
+
+
+def monty_hall_curves(n_simulations=1000, n_doors=3, n_open=1, seed=None,
+                      n_points=500, batch_size=BATCH_SIZE):
+    """
+    分批模拟并计算胜率随模拟次数变化的曲线
+    只在对数间隔的采样点上记录胜率，内存只与 batch_size 和 n_points 有关
+    :return: (采样点的模拟次数, 坚持胜率, 换门胜率)
+    """
+    rng = np.random.default_rng(seed)
+    grid = np.unique(np.geomspace(1, n_simulations, n_points).astype(np.int64))
+    stick_probs = np.empty(len(grid))
+    switch_probs = np.empty(len(grid))
     stick_wins = 0
-    # 用于记录概率变化，以便绘图
-    switch_probs = []
-    stick_probs = []
-    for i in range(1, n_simulations + 1):
-        # 1. 放置奖品：0, 1, 2 代表三扇门，随机选一个放车
-        doors = ['goat', 'goat', 'goat']
-        car_position = random.randint(0, 2)
-        doors[car_position] = 'car'
-        # 2. 参赛者选择
-        choice = random.randint(0, 2)
-        # 3. 主持人打开一扇是羊的门 (且不是参赛者选的那扇)
-        # 这一步在纯概率计算中可以简化：
-        # 如果坚持选择 (stick)，只要原选择是车就赢。
-        # 如果换门 (switch)，只要原选择是羊，换门后必然是车 (因为主持人排除了另一只羊)。
-        # 策略 1: 坚持原选择
-        if doors[choice] == 'car':
-            stick_wins += 1
-        # 策略 2: 换门
-        # 如果一开始选的是羊，换门必赢；如果一开始选的是车，换门必输。
-        if doors[choice] == 'goat':
-            switch_wins += 1
-        # 记录当前的胜率
-        switch_probs.append(switch_wins / i)
-        stick_probs.append(stick_wins / i)
+    switch_wins = 0
+    done = 0
+    while done < n_simulations:
+        size = min(batch_size, n_simulations - done)
+        outcomes = monty_hall_trials(rng, size, n_doors, n_open)
+        # 本批内的累计胜场 = 之前的胜场 + 本批的前缀和
+        stick_cum = np.cumsum(outcomes[:, 0], dtype=np.int64) + stick_wins
+        switch_cum = np.cumsum(outcomes[:, 1], dtype=np.int64) + switch_wins
+        # 找出落在本批内的采样点
+        lo, hi = np.searchsorted(grid, [done + 1, done + size + 1])
+        idx = grid[lo:hi] - done - 1
+        stick_probs[lo:hi] = stick_cum[idx] / grid[lo:hi]
+        switch_probs[lo:hi] = switch_cum[idx] / grid[lo:hi]
+        stick_wins = int(stick_cum[-1])
+        switch_wins = int(switch_cum[-1])
+        done += size
+    return grid, stick_probs, switch_probs
+
+
+def plot_convergence(grid, stick_probs, switch_probs, n_doors=3, n_open=1, output=None, show=False):
+    """
+    绘制胜率收敛曲线
+    :param output: 图片保存路径，None 表示不保存
+    :param show: 是否弹出窗口显示 (批处理任务中保持 False)
+    """
+    plt = pyplot(show)  # 无显示环境下也能保存图片
+
+    stick_theory, switch_theory = theoretical_win_rates(n_doors, n_open)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    plot_series(ax, switch_probs, grid, method='lttb', label='Switch Strategy (Change)')
+    plot_series(ax, stick_probs, grid, method='lttb', label='Stick Strategy (Keep)')
+    ax.axhline(y=switch_theory, color='r', linestyle='--', alpha=0.5,
+               label=f'Theoretical {switch_theory:.4f}')
+    ax.axhline(y=stick_theory, color='g', linestyle='--', alpha=0.5,
+               label=f'Theoretical {stick_theory:.4f}')
+    ax.set_xscale('log')
+    ax.set_title(f'Monty Hall Problem ({n_doors} doors, host opens {n_open}): '
+                 f'Win Probability Convergence')
+    ax.set_xlabel('Number of Simulations')
+    ax.set_ylabel('Win Probability')
+    ax.legend()
+    ax.grid(True)
+    if output:
+        fig.savefig(output)
+        print(f"图表已保存为 {output}")
+    if show:
+        plt.show()
+    plt.close(fig)
+
+
+def monty_hall_simulation(n_simulations=1000, n_doors=3, n_open=1, seed=None, output=None, show=False):
+    if n_simulations < 1:
+        raise ValueError(f"模拟次数必须为正整数: {n_simulations}")
+    grid, stick_probs, switch_probs = monty_hall_curves(n_simulations, n_doors, n_open, seed)
+    stick_theory, switch_theory = theoretical_win_rates(n_doors, n_open)
     # 输出结果
-    print(f"模拟次数: {n_simulations}")
-    print(f"坚持原选择胜率: {stick_wins / n_simulations:.4f} (理论值 0.3333)")
-    print(f"换门胜率:       {switch_wins / n_simulations:.4f} (理论值 0.6667)")
+    print(f"模拟次数: {n_simulations} ({n_doors} 扇门, 主持人打开 {n_open} 扇)")
+    print(f"坚持原选择胜率: {stick_probs[-1]:.4f} (理论值 {stick_theory:.4f})")
+    print(f"换门胜率:       {switch_probs[-1]:.4f} (理论值 {switch_theory:.4f})")
     # 绘图
-    plt.figure(figsize=(10, 6))
-    plt.plot(switch_probs, label='Switch Strategy (Change)')
-    plt.plot(stick_probs, label='Stick Strategy (Keep)')
-    plt.axhline(y=0.6666, color='r', linestyle='--', alpha=0.5, label='Theoretical 2/3')
-    plt.axhline(y=0.3333, color='g', linestyle='--', alpha=0.5, label='Theoretical 1/3')
-    plt.title('Monty Hall Problem: Win Probability Convergence')
-    plt.xlabel('Number of Simulations')
-    plt.ylabel('Win Probability')
-    plt.legend()
-    plt.grid(True)
-    plt.show()
-# 运行仿真
-monty_hall_simulation(2000)
\ No newline at end of file
+    if output or show:
+        plot_convergence(grid, stick_probs, switch_probs, n_doors, n_open, output, show)
+    return stick_probs[-1], switch_probs[-1]
+
+
+def monty_hall_parallel(n_simulations=1000000, n_doors=3, n_open=1, workers=None, seed=None,
+                        target_se=None, min_trials=MIN_TRIALS):
+    """多进程运行三门问题仿真，返回 RunningStats (mean 依次为 [坚持胜率, 换门胜率])"""
+    trial_fn = partial(monty_hall_trials, n_doors=n_doors, n_open=n_open)
+    stats = run_trials(trial_fn, n_simulations, workers=workers, seed=seed, target_se=target_se,
+                       min_trials=min_trials)
+    stick_rate, switch_rate = stats.mean
+    stick_se, switch_se = stats.stderr
+    stick_theory, switch_theory = theoretical_win_rates(n_doors, n_open)
+    print(f"模拟次数: {stats.n} (种子 {stats.seed})")
+    print(f"坚持原选择胜率: {stick_rate:.4f} ± {stick_se:.4f} (理论值 {stick_theory:.4f})")
+    print(f"换门胜率:       {switch_rate:.4f} ± {switch_se:.4f} (理论值 {switch_theory:.4f})")
+    return stats
+
+
+def monty_hall_sampling(n_simulations=100000, n_doors=3, n_open=1, method='iid', replicates=32, seed=None):
+    """用指定的采样方式估计胜率，并报告相对 i.i.d. 采样的有效样本量"""
+    integrand = partial(monty_hall_integrand, n_doors=n_doors, n_open=n_open)
+    result = estimate_mean(integrand, n_simulations, 3, method, replicates, seed)
+    stick_theory, switch_theory = theoretical_win_rates(n_doors, n_open)
+    print(f"模拟次数: {result.n} (采样方式 {method}, {result.replicates} 个独立重复)")
+    for name, k, theory in (("坚持原选择", 0, stick_theory), ("换门", 1, switch_theory)):
+        print(f"{name}胜率: {result.mean[k]:.4f} ± {result.stderr[k]:.4f} (理论值 {theory:.4f}) | "
+              f"有效样本量 {result.effective_sample_size[k]:,.0f}, "
+              f"误差缩小 {result.error_reduction[k]:.2f} 倍")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="三门问题 (Monty Hall) 仿真")
+    parser.add_argument("-n", "--simulations", type=int, default=2000, help="模拟次数")
+    parser.add_argument("--doors", type=int, default=3, help="门的数量")
+    parser.add_argument("--open", type=int, default=1, dest="n_open", help="主持人打开的羊门数量")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    parser.add_argument("--workers", type=int, default=1, help="进程数 (大于 1 时并行，不绘制曲线)")
+    parser.add_argument("--method", choices=list(SAMPLERS), default=None,
+                        help="采样方式 (指定后报告有效样本量，不绘制曲线)")
+    parser.add_argument("--replicates", type=int, default=32, help="采样方式的独立重复次数")
+    parser.add_argument("-o", "--output", default=None, help="收敛曲线的保存路径")
+    parser.add_argument("--show", action="store_true", help="弹出窗口显示收敛曲线")
+    args = parser.parse_args(argv)
+    if args.simulations < 1:
+        parser.error("-n/--simulations 必须为正整数")
+    try:
+        check_doors(args.doors, args.n_open)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.replicates < 2:
+        parser.error("--replicates 至少为 2")
+
+    if args.method is not None:
+        monty_hall_sampling(args.simulations, args.doors, args.n_open, args.method,
+                            args.replicates, args.seed)
+    elif args.workers > 1:
+        monty_hall_parallel(args.simulations, args.doors, args.n_open, args.workers, args.seed)
+    else:
+        monty_hall_simulation(args.simulations, args.doors, args.n_open, args.seed,
+                              args.output, args.show)
+
+
+if __name__ == "__main__":
+    # 运行仿真
+    main()
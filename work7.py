@@ -1,22 +1,128 @@
-import turtle
-import random
+import argparse
 import math
+import time
+from statistics import NormalDist
+
+import numpy as np
+
+from simulation import BATCH_SIZE, MIN_TRIALS, SAMPLERS, estimate_mean, run_trials
+
 # 1. 设置基础参数
-RADIUS = 150  # 圆的半径 (调大一点看得更清楚)
+RADIUS = 150  # 圆的半径 (仅用于可视化)
 SAMPLES = 5000  # 模拟投点的次数
 WIDTH = RADIUS * 2.2  # 窗口大小
-# 2. 初始化画布
-screen = turtle.Screen()
-screen.title(f"蒙特卡洛仿真 PI - 半径: {RADIUS}")
-screen.setup(WIDTH * 2, WIDTH * 2)
-screen.tracer(0)  # 关闭自动刷新，极大提高绘制速度
-# 初始化画笔
-pen = turtle.Turtle()
-pen.hideturtle()
-pen.speed(0)
-pen.width(2)
-
-def draw_boundaries():
+CHUNK_SIZE = 1 << 20  # 每批生成的点数，决定内存上限 (约 2 * 8MB)
+
+
+def pi_trials(rng, n):
+    """投 n 个点，返回每个点是否落在圆内 (布尔数组)"""
+    # 在单位正方形 [0, 1)^2 中投点，落在四分之一圆内的比例同样是 PI / 4
+    x = rng.random(n)
+    y = rng.random(n)
+    # 直接比较距离的平方，省去 sqrt
+    x *= x
+    y *= y
+    x += y
+    return x <= 1.0
+
+
+def pi_integrand(u):
+    """u 为 [0, 1)^2 中的点 (形状 (n, 2))，返回是否落在四分之一圆内"""
+    return (u * u).sum(axis=1) <= 1.0
+
+
+def iter_pi_estimates(n_samples=SAMPLES, chunk_size=CHUNK_SIZE, seed=None, confidence=0.95):
+    """
+    分批投点估计 PI，每处理完一批就产出一次当前的估计值
+    :param n_samples: 总投点次数 (可以到 10^9 以上，内存只与 chunk_size 有关)
+    :param chunk_size: 每批生成的点数
+    :param seed: 随机种子，便于复现
+    :param confidence: 置信水平
+    :return: 生成器，每次产出 (已投点数, 命中数, PI 估计值, 置信区间半宽)
+    :raises ValueError: chunk_size 小于 1
+    """
+    if chunk_size < 1:
+        raise ValueError(f"每批点数必须为正整数: {chunk_size}")
+    rng = np.random.default_rng(seed)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    hits = 0
+    done = 0
+    while done < n_samples:
+        size = min(chunk_size, n_samples - done)
+        hits += int(np.count_nonzero(pi_trials(rng, size)))
+        done += size
+        p = hits / done
+        # 二项分布的标准误：se(PI) = 4 * sqrt(p * (1 - p) / n)
+        half_width = z * 4 * math.sqrt(p * (1 - p) / done)
+        yield done, hits, 4 * p, half_width
+
+
+def estimate_pi(n_samples=SAMPLES, chunk_size=CHUNK_SIZE, seed=None, confidence=0.95, verbose=False):
+    """运行完整的估计，返回最终的 (PI 估计值, 置信区间半宽)"""
+    estimate, half_width = float('nan'), float('nan')
+    next_report = 1
+    for done, _, estimate, half_width in iter_pi_estimates(n_samples, chunk_size, seed, confidence):
+        # 投点数每增长 10 倍输出一次，避免刷屏
+        if verbose and (done >= next_report or done == n_samples):
+            print(f"  已投点 {done:>13,d} | PI ≈ {estimate:.6f} ± {half_width:.6f}")
+            while next_report <= done:
+                next_report *= 10
+    return estimate, half_width
+
+
+def estimate_pi_parallel(n_samples=SAMPLES, workers=None, seed=None, precision=None,
+                         confidence=0.95, batch_size=BATCH_SIZE, verbose=False, min_trials=MIN_TRIALS):
+    """
+    多进程估计 PI，每批使用独立的随机数流，给定 seed 时结果与进程数无关
+    :param precision: 目标置信区间半宽，达到后提前停止 (None 表示跑满 n_samples)
+    :param min_trials: 提前停止前至少要投的点数
+    :return: (PI 估计值, 置信区间半宽, RunningStats)
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    # PI = 4 * 命中率，所以命中率的目标标准误要除以 4z
+    target_se = None if precision is None else precision / (4 * z)
+
+    def report(stats):
+        if verbose:
+            print(f"  已投点 {stats.n:>13,d} | PI ≈ {4 * stats.mean[0]:.6f} "
+                  f"± {4 * z * stats.stderr[0]:.6f}")
+
+    stats = run_trials(pi_trials, n_samples, batch_size=batch_size, workers=workers, seed=seed,
+                       target_se=target_se, min_trials=min_trials, callback=report)
+    return 4 * stats.mean[0], 4 * z * stats.stderr[0], stats
+
+
+def estimate_pi_sampling(n_samples=SAMPLES, method='iid', replicates=32, seed=None, confidence=0.95):
+    """
+    用指定的采样方式 (对偶/拉丁超立方/Halton/Sobol) 估计 PI
+    :return: (PI 估计值, 置信区间半宽, SamplingResult)
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    result = estimate_mean(pi_integrand, n_samples, 2, method, replicates, seed)
+    return 4 * result.mean[0], 4 * z * result.stderr[0], result
+
+
+def draw_samples(n_points=SAMPLES, seed=None):
+    """
+    用 turtle 画出一小部分样本点 (只做展示，不参与估计)
+    :param n_points: 画出的点数，建议不超过几千个
+    """
+    import turtle  # 只有需要画图时才导入，无显示环境也能运行估计
+
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(-RADIUS, RADIUS, size=(n_points, 2))
+    inside = (points ** 2).sum(axis=1) <= RADIUS ** 2
+    # 2. 初始化画布
+    screen = turtle.Screen()
+    screen.title(f"蒙特卡洛仿真 PI - 半径: {RADIUS}")
+    screen.setup(WIDTH * 2, WIDTH * 2)
+    screen.tracer(0)  # 关闭自动刷新，极大提高绘制速度
+    # 初始化画笔
+    pen = turtle.Turtle()
+    pen.hideturtle()
+    pen.speed(0)
+    pen.width(2)
+    # 画出正方形和圆
     pen.color("black")
     pen.penup()
     pen.goto(-RADIUS, -RADIUS)  # 移动到左下角
@@ -30,34 +136,66 @@ def draw_boundaries():
     pen.color("red")  # 圆的颜色
     pen.circle(RADIUS)  # 画圆
     pen.penup()
-draw_boundaries()
-screen.update()  # 刷新一下显示出圆
-
-in_circle_count = 0
-print("开始仿真...")
-for i in range(SAMPLES):
-    # 随机生成坐标 (-RADIUS 到 RADIUS)
-    x = random.uniform(-RADIUS, RADIUS)
-    y = random.uniform(-RADIUS, RADIUS)
-    pen.goto(x, y)
-    # 计算距离原点的距离 (x^2 + y^2)
-    distance = math.sqrt(x ** 2 + y ** 2)
-    if distance <= RADIUS:
-        pen.color("red")  # 圆内：红色
-        in_circle_count += 1
+    # 3. 只画点，不做计算；整批画完后刷新一次
+    for (x, y), hit in zip(points, inside):
+        pen.goto(x, y)
+        pen.color("red" if hit else "blue")  # 圆内：红色，圆外：蓝色
+        pen.dot(5)
+    pi_estimate = 4 * inside.mean()
+    pen.goto(0, RADIUS + 10)
+    pen.color("black")
+    pen.write(f"展示点数: {n_points}, 估计 Pi: {pi_estimate:.6f}",
+              align="center", font=("Arial", 16, "bold"))
+    screen.update()
+    screen.exitonclick()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="蒙特卡洛仿真估计 PI")
+    parser.add_argument("-n", "--samples", type=int, default=SAMPLES, help="投点次数")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="每批生成的点数")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    parser.add_argument("--confidence", type=float, default=0.95, help="置信水平")
+    parser.add_argument("--workers", type=int, default=1, help="进程数 (大于 1 时并行)")
+    parser.add_argument("--precision", type=float, default=None,
+                        help="目标置信区间半宽，达到后提前停止")
+    parser.add_argument("--min-trials", type=int, default=MIN_TRIALS,
+                        help="提前停止前至少要投的点数")
+    parser.add_argument("--method", choices=list(SAMPLERS), default=None,
+                        help="采样方式 (指定后按独立重复估计误差，并报告有效样本量)")
+    parser.add_argument("--replicates", type=int, default=32, help="采样方式的独立重复次数")
+    parser.add_argument("--show", type=int, default=0, metavar="N",
+                        help="用 turtle 画出 N 个样本点 (默认不画)")
+    args = parser.parse_args(argv)
+    if args.samples < 1:
+        parser.error("-n/--samples 必须为正整数")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size 必须为正整数")
+    if args.replicates < 2:
+        parser.error("--replicates 至少为 2")
+
+    print("开始仿真...")
+    start = time.perf_counter()
+    if args.method is not None:
+        pi_estimate, half_width, result = estimate_pi_sampling(
+            args.samples, args.method, args.replicates, args.seed, args.confidence)
+        print(f"  采样方式 {result.method}: 有效样本量 {result.effective_sample_size[0]:,.0f} "
+              f"/ {result.n:,d}, 误差缩小 {result.error_reduction[0]:.2f} 倍")
+    elif args.workers > 1 or args.precision is not None:
+        pi_estimate, half_width, stats = estimate_pi_parallel(
+            args.samples, args.workers, args.seed, args.precision, args.confidence,
+            args.chunk_size, verbose=True, min_trials=args.min_trials)
+        if stats.stopped_early:
+            print(f"已达到目标精度，提前停止 (共 {stats.n:,d} 次)")
     else:
-        pen.color("blue")  # 圆外：蓝色
-    pen.dot(5)  # 画一个小点
-    # 每画 10 个点刷新一次屏幕，以此产生动画效果
-    if i % 10 == 0:
-        screen.update()
-# 4. 计算并显示结果
-pi_estimate = 4 * in_circle_count / SAMPLES
-screen.update()  # 最后刷新
-# 在图上写出结果
-pen.goto(0, RADIUS + 10)
-pen.color("black")
-pen.write(f"模拟次数: {SAMPLES}, 估计 Pi: {pi_estimate:.6f}",
-          align="center", font=("Arial", 16, "bold"))
-print(f"最终估计 PI: {pi_estimate}")
-screen.exitonclick()
\ No newline at end of file
+        pi_estimate, half_width = estimate_pi(args.samples, args.chunk_size, args.seed,
+                                              args.confidence, verbose=True)
+    elapsed = time.perf_counter() - start
+    print(f"最终估计 PI: {pi_estimate:.8f} ± {half_width:.8f} "
+          f"({args.confidence:.0%} 置信区间, 用时 {elapsed:.2f}s)")
+    if args.show > 0:
+        draw_samples(args.show, args.seed)
+
+
+if __name__ == "__main__":
+    main()